@@ -1,9 +1,20 @@
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
 from unfold.admin import ModelAdmin
-from django.contrib.humanize.templatetags.humanize import intcomma
 from decimal import Decimal
 from django import forms
-from .models import Branch, Worker, Product, Supplier, Customer, Sale, SaleItem, AddProduct, History, AddProductItem, Expense, Investor, DailyReport
+from django.db.models import F
+from datetime import datetime, time, timedelta
+from urllib.parse import urlencode
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .formatting import format_money, format_quantity
+from .paginators import KeysetPaginator
+from .services.profit import profit_rows, profit_totals
+from .models import Branch, Worker, Product, Supplier, Customer, DebtEntry, Sale, SaleItem, AddProduct, History, AddProductItem, Expense, Investor, DailyReport, StockAlert, Job
 
 @admin.register(Branch)
 class BranchAdmin(ModelAdmin):
@@ -30,21 +41,13 @@ class InvestorAdmin(ModelAdmin):
 
     @admin.display(description="Sarmoya ")
     def formatted_invest(self, obj):
-        amount = obj.invest or Decimal('0')
-
-        if amount == amount.to_integral_value():
-            amount_str = intcomma(amount.quantize(Decimal('1')))
-        else:
-            amount_str = intcomma(amount.normalize())
-
-        if obj.currency == 'UZS':
-            return f"{amount_str} so‘m"
-        return f"${amount_str}"
+        return format_money(obj.invest, obj.currency)
     
 
 @admin.register(Worker)
 class WorkerAdmin(admin.ModelAdmin):
     list_display = ('name', 'branch', 'position')
+    list_select_related = ('branch',)
     autocomplete_fields = ('branch', )
     search_fields = ('name','position')
     list_filter = ('branch',)
@@ -52,29 +55,34 @@ class WorkerAdmin(admin.ModelAdmin):
 
 
 
+class LowStockFilter(admin.SimpleListFilter):
+    title = "Qoldiq holati"
+    parameter_name = 'low_stock'
+
+    def lookups(self, request, model_admin):
+        return (('1', "Kam qolgan"),)
+
+    def queryset(self, request, queryset):
+        if self.value() == '1':
+            return queryset.filter(quantity__lte=F('reorder_level'))
+        return queryset
+
+
 @admin.register(Product)
 class ProductAdmin(ModelAdmin):
-    list_display = ('name', 'barcode', 'formatted_cost_price', 'formatted_sale_price', 'quantity_format')
+    list_display = ('name', 'barcode', 'formatted_cost_price', 'formatted_average_cost', 'formatted_sale_price', 'quantity_format', 'reorder_level')
     search_fields = ('name', 'barcode')
     autocomplete_fields = ('branch', )
-    list_filter = ('branch',)
+    list_filter = ('branch', LowStockFilter)
     ordering = ('-id',)
 
     @admin.display(description="Mavjud miqdor")
     def quantity_format(self, obj):
-        amount = obj.quantity or Decimal('0')
-
-        if amount == amount.to_integral_value():
-            amount_str = intcomma(amount.quantize(Decimal('1')))
-        else:
-            amount_str = intcomma(amount.normalize())
-
-        
-        return f"{amount_str} dona"
+        return format_quantity(obj.quantity)
     
     fieldsets = (
         ('Mahsulot maʼlumotlari', {
-            'fields': ('branch', 'name', 'barcode', 'quantity'),
+            'fields': ('branch', 'name', 'barcode', 'quantity', 'reorder_level'),
         }),
         (
             'Mahsulot narxlari', {
@@ -94,34 +102,27 @@ class ProductAdmin(ModelAdmin):
 
     @admin.display(description="Sotib olish narxi")
     def formatted_cost_price(self, obj):
-        amount = obj.cost_price or Decimal('0')
-
-        if amount == amount.to_integral_value():
-            amount_str = intcomma(amount.quantize(Decimal('1')))
-        else:
-            amount_str = intcomma(amount.normalize())
-        
-        return f"{amount_str} so‘m"
+        return format_money(obj.cost_price)
     
+    @admin.display(description="O'rtacha tannarx")
+    def formatted_average_cost(self, obj):
+        return format_money(obj.average_cost)
+
     @admin.display(description="Sotish narxi")
     def formatted_sale_price(self, obj):
-        amount = obj.sale_price or Decimal('0')
-
-        if amount == amount.to_integral_value():
-            amount_str = intcomma(amount.quantize(Decimal('1')))
-        else:
-            amount_str = intcomma(amount.normalize())
-        
-        return f"{amount_str} so‘m"
+        return format_money(obj.sale_price)
     
 
 @admin.register(History)
 class HistoryAdmin(admin.ModelAdmin):
     list_display = ('worker', 'product', 'change_type', 'formatted_quantity_changed', 'changed_at', )
+    list_select_related = ('worker', 'product')
     search_fields = ('product__name', 'worker__name')
     list_filter = ('worker', 'branch', 'change_type', 'changed_at')
     actions = ['delete_selected']
-    ordering = ('-changed_at',)
+    ordering = ('-changed_at', '-id')
+    paginator = KeysetPaginator
+    show_full_result_count = False
     actions_on_top = True
     actions_on_bottom = True
 
@@ -142,7 +143,47 @@ class HistoryAdmin(admin.ModelAdmin):
     # def has_delete_permission(self, request, obj=None):
     #     return False
     
-class SaleItemForm(forms.ModelForm):
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    preloaded = ()
+
+    # Tanlangan qiymat formadagi obyektdan olinadi; Django har bir inline
+    # qatori uchun alohida SELECT yuboradi
+    def optgroups(self, name, value, attr=None):
+        values = {str(v) for v in value}
+        selected = [obj for obj in self.preloaded if str(obj.pk) in values]
+        if not selected:
+            return super().optgroups(name, value, attr)
+
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        for obj in selected:
+            label = self.choices.field.label_from_instance(obj)
+            options.append(self.create_option(name, obj.pk, label, True, len(options)))
+        return [(None, options, 0)]
+
+
+class PreloadedAutocompleteForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            widget = getattr(field.widget, 'widget', field.widget)
+            if isinstance(widget, PreloadedAutocompleteSelect):
+                if self.instance._meta.get_field(name).is_cached(self.instance):
+                    widget.preloaded = [getattr(self.instance, name)]
+
+
+class PreloadedAutocompleteInline(admin.TabularInline):
+    form = PreloadedAutocompleteForm
+
+    # 🔹 autocomplete_fields dagi FK lar get_queryset dagi select_related dan o'qiladi
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request):
+            kwargs['widget'] = PreloadedAutocompleteSelect(db_field, self.admin_site, using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class SaleItemForm(PreloadedAutocompleteForm):
     class Meta:
         model = SaleItem
         fields = '__all__'
@@ -151,12 +192,15 @@ class SaleItemForm(forms.ModelForm):
         }
 
 
-class SaleItemInline(admin.TabularInline):
+class SaleItemInline(PreloadedAutocompleteInline):
     model = SaleItem
     form = SaleItemForm
     extra = 1
     autocomplete_fields = ('product',)
     readonly_fields = ('total_price',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
     fieldsets = (
         ('🧾 Mahsulotlar ro\'yhati', {
             'fields': ('product', 'quantity', 'total_price'),
@@ -164,12 +208,38 @@ class SaleItemInline(admin.TabularInline):
         )
 
 
+PROFIT_ROWS_LIMIT = 2000
+
+
+# Noto'g'ri sana (masalan 2025-02-31) standart oraliq bilan almashtiriladi
+def _parse_date(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+class HistoryBatchMixin:
+    # Inline itemlar saqlanganda / o'chirilganda History bitta INSERT bilan yoziladi
+    def save_related(self, request, form, formsets, change):
+        with History.objects.batch():
+            super().save_related(request, form, formsets, change)
+
+    def delete_queryset(self, request, queryset):
+        with History.objects.batch():
+            super().delete_queryset(request, queryset)
+
+
 @admin.register(Sale)
-class SaleAdmin(ModelAdmin):
+class SaleAdmin(HistoryBatchMixin, ModelAdmin):
     list_display = ('worker', 'amount_with_currency', 'formatted_discount', 'formatted_total_price', 'sold_at',)
+    list_select_related = ('worker',)
     autocomplete_fields = ('customer', 'worker', 'branch')
     search_fields = ('worker', )
     inlines = [SaleItemInline]
+    ordering = ('-sold_at', '-id')
+    paginator = KeysetPaginator
+    show_full_result_count = False
 
     fieldsets = (
         ('🧾 Savdo maʼlumotlari', {
@@ -182,81 +252,159 @@ class SaleAdmin(ModelAdmin):
 
     readonly_fields = ('total_price', 'discount', )
 
+    def get_urls(self):
+        return [
+            path('profit/', self.admin_site.admin_view(self.profit_view), name='api_sale_profit'),
+        ] + super().get_urls()
+
+    # 🔹 Filial × mahsulot × kun yalpi foyda (bitta GROUP BY, api.services.profit)
+    def profit_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+
+        today = timezone.localdate()
+        start = _parse_date(request.GET.get('start')) or today - timedelta(days=6)
+        end = _parse_date(request.GET.get('end')) or today
+        branch_id = request.GET.get('branch', '')
+        branch = Branch.objects.filter(pk=branch_id).first() if branch_id.isdigit() else None
+
+        start_at = timezone.make_aware(datetime.combine(start, time.min))
+        end_at = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+        rows = list(profit_rows(start_at, end_at, branch)[:PROFIT_ROWS_LIMIT + 1])
+        for row in rows:
+            row['quantity'] = format_quantity(row['quantity'])
+            for field in ('revenue', 'cost', 'profit'):
+                row[field] = format_money(row[field])
+
+        totals = profit_totals(start_at, end_at, branch)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Foyda hisoboti",
+            'branches': Branch.objects.order_by('name'),
+            'branch': branch,
+            'start': start,
+            'end': end,
+            'rows': rows[:PROFIT_ROWS_LIMIT],
+            'truncated': len(rows) > PROFIT_ROWS_LIMIT,
+            'totals': {name: format_money(value) for name, value in totals.items()},
+            'export_query': urlencode({
+                'branch': branch.pk if branch else '',
+                'start': start_at.isoformat(),
+                'end': end_at.isoformat(),
+            }),
+        }
+        return TemplateResponse(request, 'admin/api/sale/profit_report.html', context)
+
     @admin.display(description="To'langan summa")
     def amount_with_currency(self, obj):
-        amount = obj.amount or Decimal('0')
-
-        # Decimal bo‘lib qoladi, faqat ko‘rinishda .00 olib tashlanadi
-        if amount == amount.to_integral_value():
-            amount_str = intcomma(amount.quantize(Decimal('1')))
-        else:
-            amount_str = intcomma(amount.normalize())
-
-        if obj.currency == 'UZS':
-            return f"{amount_str} so‘m"
-        return f"${amount_str}"
+        return format_money(obj.amount, obj.currency)
 
 
     @admin.display(description="To'plam")
     def formatted_total_price(self, obj):
-        amount = obj.total_price or Decimal('0')
-
-        if amount == amount.to_integral_value():
-            amount_str = intcomma(amount.quantize(Decimal('1')))
-        else:
-            amount_str = intcomma(amount.normalize())
-
-        if obj.currency == 'UZS':
-            return f"{amount_str} so‘m"
-        return f"${amount_str}"
+        return format_money(obj.total_price, obj.currency)
     
     @admin.display(description="Chegirma")
     def formatted_discount(self, obj):
-        amount = obj.discount or Decimal('0')
-
-        if amount == amount.to_integral_value():
-            amount_str = intcomma(amount.quantize(Decimal('1')))
-        else:
-            amount_str = intcomma(amount.normalize())
+        return format_money(obj.discount, obj.currency)
 
-        if obj.currency == 'UZS':
-            return f"{amount_str} so‘m"
-        return f"${amount_str}"
 
 
-
-class AddProductItemInline(admin.TabularInline):
+class AddProductItemInline(PreloadedAutocompleteInline):
     model = AddProductItem
     extra = 1
     autocomplete_fields = ('product', )
     readonly_fields = ('total_price', 'added_quantity',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
+
 
 @admin.register(AddProduct)
-class AddProductAdmin(ModelAdmin):
+class AddProductAdmin(HistoryBatchMixin, ModelAdmin):
     inlines = [AddProductItemInline]
     list_display = ('id', 'worker', 'added_at')
+    list_select_related = ('worker',)
     autocomplete_fields = ('branch', 'worker', 'supplier')
     ordering = ('-added_at',)
     
 
+class DebtEntryInline(admin.TabularInline):
+    model = DebtEntry
+    extra = 0
+    fields = ('created_at', 'kind', 'amount', 'sale')
+    readonly_fields = fields
+    ordering = ('-created_at',)
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Customer)
 class CustomerAdmin(admin.ModelAdmin):
     list_display = ('name', 'phone_number', 'formatted_debt', 'description')
     search_fields = ('name', 'phone_number')
     autocomplete_fields = ('branch', )
     ordering = ('-id',)
+    readonly_fields = ('debt',)
+    inlines = [DebtEntryInline]
 
     @admin.display(description="Summa")
     def formatted_debt(self, obj):
-        amount = obj.debt or Decimal('0')
+        return format_money(obj.debt)
+
+
+@admin.register(StockAlert)
+class StockAlertAdmin(ModelAdmin):
+    list_display = ('product', 'branch', 'quantity', 'reorder_level', 'created_at', 'resolved_at')
+    list_select_related = ('product', 'branch')
+    list_filter = ('branch', ('resolved_at', admin.EmptyFieldListFilter))
+    search_fields = ('product__name', 'product__barcode')
+    ordering = ('-created_at', '-id')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
-        if amount == amount.to_integral_value():
-            amount_str = intcomma(amount.quantize(Decimal('1')))
-        else:
-            amount_str = intcomma(amount.normalize())
-        
-        return f"{amount_str} so‘m"
+
+class DebtPaymentForm(forms.ModelForm):
+    class Meta:
+        model = DebtEntry
+        fields = ('customer', 'amount')
+
+    def clean_amount(self):
+        amount = self.cleaned_data['amount']
+        if amount <= 0:
+            raise forms.ValidationError("To‘lov summasi musbat bo‘lishi kerak")
+        return amount
+
+
+@admin.register(DebtEntry)
+class DebtEntryAdmin(admin.ModelAdmin):
+    # Ledger faqat qo'shiladi: admin orqali faqat to'lov kiritiladi
+    form = DebtPaymentForm
+    list_display = ('customer', 'kind', 'amount', 'sale', 'created_at')
+    list_select_related = ('customer',)
+    list_filter = ('kind', 'customer__branch')
+    search_fields = ('customer__name', 'customer__phone_number')
+    autocomplete_fields = ('customer',)
+    ordering = ('-created_at', '-id')
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        obj.kind = DebtEntry.PAYMENT
+        obj.amount = -form.cleaned_data['amount']
+        obj.save()
 
 
 @admin.register(Supplier)
@@ -280,21 +428,17 @@ class SupplierAdmin(admin.ModelAdmin):
 @admin.register(Expense)
 class ExpenseAdmin(admin.ModelAdmin):
     list_display = ('worker', 'category', 'formatted_amount', 'description', 'incurred_at')
+    list_select_related = ('worker',)
     search_fields = ('worker', )
     list_filter = ('branch',)
     autocomplete_fields = ('branch', 'worker', )
     ordering = ('-id',)
+    paginator = KeysetPaginator
+    show_full_result_count = False
 
     @admin.display(description="Summa")
     def formatted_amount(self, obj):
-        amount = obj.amount or Decimal('0')
-
-        if amount == amount.to_integral_value():
-            amount_str = intcomma(amount.quantize(Decimal('1')))
-        else:
-            amount_str = intcomma(amount.normalize())
-        
-        return f"{amount_str} so‘m"
+        return format_money(obj.amount)
     
 
 @admin.register(DailyReport)
@@ -307,10 +451,12 @@ class DailyReportAdmin(ModelAdmin):
 
     search_fields = ["branch", ]
     list_filter = ["branch", ]
+    list_select_related = ["branch", ]
     autocomplete_fields = ["branch", ]
     ordering = ["-created_at",]
 
     readonly_fields = ["total_sales"]
+    actions = ["recalculate_in_background"]
 
     fieldsets = (
         ("Filial", {
@@ -320,41 +466,53 @@ class DailyReportAdmin(ModelAdmin):
             "fields": ("total_sales",),
         }),
     )
+    @admin.action(description="Fon rejimida qayta hisoblash")
+    def recalculate_in_background(self, request, queryset):
+        from .services import jobs
+
+        created = [jobs.enqueue('daily_report', {'report': pk}, force=True) for pk in queryset.values_list('pk', flat=True)]
+        self.message_user(request, f"{len(created)} ta hisobot navbatga qo‘yildi (run_jobs)")
+
     # 🔹 Total sales
     @admin.display(description="Jami kassa")
     def total_sales_display(self, obj):
-        value = obj.total_sales or Decimal('0')
-        # Agar butun bo‘lsa nolsiz chiqarish, aks holda normal format
-        if value == value.to_integral_value():
-            return f"{int(value):,} so'm"
-        return f"{value:,} so'm"
+        return format_money(obj.total_sales)
 
     # 🔹 Total discounts
     @admin.display(description="Jami chegirmalar")
     def total_discounts_display(self, obj):
-        value = obj.total_discounts or Decimal('0')
-        if value == value.to_integral_value():
-            return f"{int(value):,} so'm"
-        return f"{value:,} so'm"
+        return format_money(obj.total_discounts)
 
     # 🔹 Total purchase
     @admin.display(description="Jami sotib olishlar")
     def total_purchase_display(self, obj):
-        value = obj.total_purchase or Decimal('0')
-        if value == value.to_integral_value():
-            return f"{int(value):,} so'm"
-        return f"{value:,} so'm"
+        return format_money(obj.total_purchase)
 
     # 🔹 Total debt
     @admin.display(description="Jami qarzlar")
     def total_debt_display(self, obj):
-        value = obj.total_debt or Decimal('0')
-        if value == value.to_integral_value():
-            return f"{int(value): ,} so'm"
-        return f"{value:,} so'm"
+        return format_money(obj.total_debt)
     
     @admin.display(description="Hiosbot sanasi")
     def end_date_display(self, obj):
         return obj.end_datetime.date()
 
 
+@admin.register(Job)
+class JobAdmin(ModelAdmin):
+    list_display = ('id', 'name', 'status', 'progress', 'message', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    ordering = ('-created_at', '-id')
+    readonly_fields = (
+        'name', 'params', 'status', 'progress', 'message', 'result', 'error',
+        'attempts', 'worker', 'created_at', 'started_at', 'finished_at',
+    )
+    actions = ['requeue']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Qayta navbatga qo‘yish")
+    def requeue(self, request, queryset):
+        count = queryset.exclude(status=Job.RUNNING).update(status=Job.PENDING, attempts=0, progress=0)
+        self.message_user(request, f"{count} ta vazifa navbatga qo‘yildi")
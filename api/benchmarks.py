@@ -0,0 +1,243 @@
+import random
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.humanize.templatetags.humanize import intcomma
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.formatting import format_money
+from api.models import AddProduct, AddProductItem, Branch, DailyReport, Product, Sale, Worker
+from api.services import export
+from api.services.checkout import checkout
+from api.services.profit import profit_rows
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, round(fraction * (len(values) - 1)))]
+
+
+class Context:
+    # 🔹 Scenariylar uchun seed qilingan bazadan olingan umumiy ma'lumotlar
+    def __init__(self, basket_size=10, seed=0):
+        self.rng = random.Random(seed)
+        self.basket_size = basket_size
+        self.branch = Branch.objects.filter(products__isnull=False).order_by('pk').first()
+        if self.branch is None:
+            raise LookupError("Bazada mahsulotli filial yo'q, avval seed_data ishga tushiring")
+        self.worker = Worker.objects.filter(branch=self.branch).first()
+        self.products = list(
+            Product.objects.filter(branch=self.branch, base_unit='pcs').order_by('pk')[:2000]
+        )
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            user, _ = get_user_model().objects.get_or_create(
+                username='benchmark', defaults={'is_staff': True, 'is_superuser': True}
+            )
+            self._client = Client(HTTP_HOST='localhost')
+            self._client.force_login(user)
+        return self._client
+
+
+def run(name, ctx, iterations):
+    operation = SCENARIOS[name](ctx)
+    timings, queries = [], []
+
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            operation()
+            timings.append(time.perf_counter() - started)
+        queries.append(len(captured.captured_queries))
+
+    total = sum(timings)
+    return {
+        'scenario': name,
+        'ops': iterations,
+        'queries_per_op': sum(queries) / iterations,
+        'max_queries': max(queries),
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'ops_per_sec': iterations / total if total else 0.0,
+    }
+
+
+# 🔹 Bir nechta oqim parallel checkout qiladi (har biri o'z ulanishi bilan).
+# Tranzaksiyadan tashqarida ishlaydi, yozilgan savdolar bazada qoladi.
+def run_concurrent(name, threads, iterations, basket_size=10, seed=0):
+    timings, errors = [], []
+    lock = threading.Lock()
+
+    def worker(index):
+        try:
+            ctx = Context(basket_size=basket_size, seed=seed + index)
+            operation = SCENARIOS[name](ctx)
+            for _ in range(iterations):
+                started = time.perf_counter()
+                try:
+                    operation()
+                except Exception as exc:
+                    with lock:
+                        errors.append(type(exc).__name__)
+                    continue
+                elapsed = time.perf_counter() - started
+                with lock:
+                    timings.append(elapsed)
+        finally:
+            connection.close()
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    return {
+        'scenario': f'{name} x{threads}',
+        'ops': len(timings),
+        'errors': len(errors),
+        'error_types': sorted(set(errors)),
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'ops_per_sec': len(timings) / wall if wall else 0.0,
+    }
+
+
+def describe_database():
+    settings_dict = connection.settings_dict
+    parts = [connection.vendor, f"CONN_MAX_AGE={settings_dict.get('CONN_MAX_AGE')}"]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            parts.append(f"journal_mode={cursor.fetchone()[0]}")
+    if settings_dict.get('OPTIONS', {}).get('pool'):
+        parts.append('pool')
+    return ', '.join(parts)
+
+
+@scenario('checkout')
+def checkout_scenario(ctx):
+    def operation():
+        basket = ctx.rng.sample(ctx.products, min(ctx.basket_size, len(ctx.products)))
+        checkout(
+            branch=ctx.branch, worker=ctx.worker, amount=Decimal('0'),
+            items=[{'product': p.pk, 'quantity': 1} for p in basket],
+        )
+    return operation
+
+
+@scenario('receiving')
+def receiving_scenario(ctx):
+    add_product = AddProduct.objects.create(branch=ctx.branch, worker=ctx.worker)
+
+    def operation():
+        AddProductItem(
+            add_product=add_product,
+            product=ctx.rng.choice(ctx.products),
+            input_quantity=Decimal('10'),
+            price=Decimal('1000'),
+        ).save()
+    return operation
+
+
+@scenario('daily_report')
+def daily_report_scenario(ctx):
+    def operation():
+        end = timezone.now() - timedelta(minutes=ctx.rng.randint(0, 60 * 24 * 30))
+        DailyReport(branch=ctx.branch, start_datetime=end - timedelta(days=1), end_datetime=end).save()
+    return operation
+
+
+def _export(kind):
+    def factory(ctx):
+        end = timezone.now()
+        start = end - timedelta(days=30)
+
+        def operation():
+            for _ in export.stream_csv(kind, ctx.branch, start, end):
+                pass
+        return operation
+    return factory
+
+
+for _kind in export.EXPORTS:
+    scenario(f'export_{_kind}')(_export(_kind))
+
+
+def _changelist(model_name):
+    def factory(ctx):
+        url = f'/admin/api/{model_name}/'
+
+        def operation():
+            response = ctx.client.get(url)
+            assert response.status_code == 200, response.status_code
+        return operation
+    return factory
+
+
+for _model in ('sale', 'history', 'product', 'dailyreport', 'expense', 'customer'):
+    scenario(f'admin_{_model}')(_changelist(_model))
+
+
+def _intcomma_money(amount, currency='UZS'):
+    # Avvalgi admin metodlari: har bir katakda quantize/normalize + intcomma
+    amount = amount or Decimal('0')
+    if amount == amount.to_integral_value():
+        amount_str = intcomma(amount.quantize(Decimal('1')))
+    else:
+        amount_str = intcomma(amount.normalize())
+    return f"{amount_str} so‘m" if currency == 'UZS' else f"${amount_str}"
+
+
+# 🔹 500 qatorli Sale changelistidagi pul ustunlari (to'langan, to'plam, chegirma).
+# p50 ni 500 ga bo'lsa bitta qatorning formatlash narxi chiqadi.
+def _money_columns(formatter):
+    def factory(ctx):
+        rows = list(
+            Sale.objects.order_by('-sold_at', '-id')
+            .values_list('amount', 'total_price', 'discount', 'currency')[:500]
+        )
+
+        def operation():
+            for amount, total_price, discount, currency in rows:
+                formatter(amount, currency)
+                formatter(total_price, currency)
+                formatter(discount, currency)
+        return operation
+    return factory
+
+
+scenario('format_money_500')(_money_columns(format_money))
+scenario('format_money_500_intcomma')(_money_columns(_intcomma_money))
+
+
+@scenario('profit_report')
+def profit_report_scenario(ctx):
+    end = timezone.now()
+    start = end - timedelta(days=30)
+
+    def operation():
+        list(profit_rows(start, end, ctx.branch))
+    return operation
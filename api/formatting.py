@@ -0,0 +1,49 @@
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.humanize.templatetags.humanize import intcomma
+from django.utils import translation
+from django.utils.formats import get_format
+
+CURRENCY_FORMATS = {
+    'UZS': "{} so‘m",
+    'USD': "${}",
+}
+
+
+# Summalar doim loyiha tilida (LANGUAGE_CODE) formatlanadi. Har katakda
+# translation.get_language() chaqirish formatlashning o'zidan qimmat.
+@lru_cache(maxsize=None)
+def _number_format():
+    with translation.override(settings.LANGUAGE_CODE):
+        return get_format('THOUSAND_SEPARATOR'), get_format('NUMBER_GROUPING')
+
+
+# 🔹 Butun summalar (narxlar, savdolar) changelistda ko'p takrorlanadi:
+# natija (qiymat, shablon) bo'yicha keshlanadi, Decimal/intcomma chetlab o'tiladi
+@lru_cache(maxsize=8192)
+def _format_integer(value, template):
+    separator, grouping = _number_format()
+    if grouping == 3:
+        number = f"{value:,}".replace(',', separator)
+    else:
+        with translation.override(settings.LANGUAGE_CODE):
+            number = intcomma(value)
+    return template.format(number)
+
+
+def _format(value, template):
+    value = value if value is not None else Decimal('0')
+    if value == value.to_integral_value():
+        return _format_integer(int(value), template)
+    with translation.override(settings.LANGUAGE_CODE):
+        return template.format(intcomma(Decimal(value).normalize()))
+
+
+def format_money(value, currency='UZS'):
+    return _format(value, CURRENCY_FORMATS.get(currency, CURRENCY_FORMATS['USD']))
+
+
+def format_quantity(value, unit='dona'):
+    return _format(value, f"{{}} {unit}")
@@ -0,0 +1,151 @@
+import atexit
+import json
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+
+# 🔹 Yoqilmagan bo'lsa (QUERY_STATS_ENABLED = False) middleware va save hooklar
+# faqat bitta bool tekshiruvi qiladi.
+ENABLED = getattr(settings, 'QUERY_STATS_ENABLED', False)
+DUMP_PATH = getattr(settings, 'QUERY_STATS_FILE', None)
+DUMP_INTERVAL = getattr(settings, 'QUERY_STATS_DUMP_INTERVAL', 10)
+
+_stats = {}
+_lock = threading.Lock()
+_local = threading.local()
+_last_dump = time.monotonic()
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.time += time.perf_counter() - started
+
+
+def record(name, queries, sql_time, total_time):
+    global _last_dump
+
+    with _lock:
+        entry = _stats.get(name)
+        if entry is None:
+            entry = _stats[name] = {
+                'calls': 0, 'queries': 0, 'sql_time': 0.0, 'total_time': 0.0,
+                'max_queries': 0, 'max_time': 0.0,
+            }
+        entry['calls'] += 1
+        entry['queries'] += queries
+        entry['sql_time'] += sql_time
+        entry['total_time'] += total_time
+        entry['max_queries'] = max(entry['max_queries'], queries)
+        entry['max_time'] = max(entry['max_time'], total_time)
+
+        due = DUMP_PATH and time.monotonic() - _last_dump >= DUMP_INTERVAL
+        if due:
+            _last_dump = time.monotonic()
+
+    if due:
+        dump()
+
+
+class measure:
+    # Ichma-ich chaqiruvlarda (masalan SaleItem.save -> Sale.save) har bir
+    # daraja o'z so'rovlarini alohida hisoblaydi, tashqi daraja esa hammasini.
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.counter = _QueryCounter()
+        self.wrapper = connection.execute_wrapper(self.counter)
+        self.wrapper.__enter__()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        total = time.perf_counter() - self.started
+        self.wrapper.__exit__(*exc)
+        record(self.name, self.counter.count, self.counter.time, total)
+        return False
+
+
+def instrumented(name):
+    def decorator(method):
+        if not ENABLED:
+            return method
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            with measure(name):
+                return method(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    with _lock:
+        data = {name: dict(entry) for name, entry in _stats.items()}
+
+    for entry in data.values():
+        calls = entry['calls'] or 1
+        entry['avg_queries'] = entry['queries'] / calls
+        entry['avg_sql_ms'] = entry['sql_time'] / calls * 1000
+        entry['avg_ms'] = entry['total_time'] / calls * 1000
+    return data
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def dump(path=None):
+    path = path or DUMP_PATH
+    if not path:
+        return
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(snapshot(), fh, indent=2, sort_keys=True)
+
+
+class QueryStatsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not ENABLED:
+            return self.get_response(request)
+
+        with measure(request.path) as m:
+            response = self.get_response(request)
+            match = getattr(request, 'resolver_match', None)
+            if match is not None and match.view_name:
+                m.name = match.view_name
+        return response
+
+    # Async so'rovlarda ORM so'rovlari boshqa oqimda bajariladi, execute_wrapper
+    # ularni ko'rmaydi, shuning uchun bu yerda o'lchanmaydi (sync view'larga
+    # moslashtirish uchun oqim band qilinmasin)
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+
+if ENABLED and DUMP_PATH:
+    atexit.register(dump)
@@ -0,0 +1,88 @@
+import shutil
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.models import Branch, DailyReport, HourlyRollup
+from api.services import export
+from api.services.debts import reconcile
+from api.services.jobs import job, result_path
+
+PROGRESS_EVERY = 5000
+
+
+def _branch(pk):
+    branch = Branch.objects.filter(pk=pk).first()
+    if branch is None:
+        raise ValidationError("Filial topilmadi")
+    return branch
+
+
+def _time(value):
+    parsed = parse_datetime(value or '')
+    if parsed is None:
+        raise ValidationError("Vaqt ISO formatda bo‘lishi kerak")
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+@job('daily_report')
+def daily_report(job, report=None, branch=None, start=None, end=None):
+    # report berilsa mavjud hisobot qayta hisoblanadi, aks holda yangisi yaratiladi
+    if report is not None:
+        instance = DailyReport.objects.get(pk=report)
+    else:
+        instance = DailyReport(branch=_branch(branch), start_datetime=_time(start), end_datetime=_time(end))
+    instance.save()
+
+    return {
+        'report': instance.pk,
+        'total_sales': instance.total_sales,
+        'total_discounts': instance.total_discounts,
+        'total_purchase': instance.total_purchase,
+        'total_debt': instance.total_debt,
+    }
+
+
+@job('export')
+def export_file(job, kind, fmt, branch, start, end):
+    if kind not in export.EXPORTS or fmt not in ('csv', 'xlsx'):
+        raise ValidationError("Noma'lum eksport turi")
+    branch = _branch(branch)
+    start, end = _time(start), _time(end)
+    path = result_path(job, f'.{fmt}')
+
+    if fmt == 'xlsx':
+        job.set_progress(message="XLSX yozilmoqda")
+        with export.write_xlsx(kind, branch, start, end) as source, open(path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as target:
+            for number, line in enumerate(export.stream_csv(kind, branch, start, end)):
+                target.write(line)
+                if number and number % PROGRESS_EVERY == 0:
+                    job.set_progress(message=f"{number} qator")
+
+    return {
+        'file': path.name,
+        'filename': f"{kind}-{branch.pk}-{start:%Y%m%d}-{end:%Y%m%d}.{fmt}",
+    }
+
+
+@job('reconcile_debts')
+def reconcile_debts(job, branch=None, fix=False):
+    checked, drifted = reconcile(branch, fix=fix)
+    return {
+        'checked': checked,
+        'drifted': [
+            {'customer': customer.pk, 'debt': customer.debt, 'ledger': expected}
+            for customer, expected in drifted[:100]
+        ],
+        'drifted_count': len(drifted),
+        'fixed': bool(fix),
+    }
+
+
+@job('rebuild_rollups')
+def rebuild_rollups(job, branch=None):
+    return {'buckets': HourlyRollup.rebuild(_branch(branch) if branch else None)}
@@ -0,0 +1,77 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Savdo, kirim, hisobot va admin sahifalari uchun so'rovlar soni, p50/p99 va o'tkazuvchanlikni o'lchaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios', nargs='*',
+            help=f"Scenariylar (standart: hammasi): {', '.join(benchmarks.SCENARIOS)}",
+        )
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--basket', type=int, default=10, help="Checkout savatidagi mahsulotlar soni")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help="Yozilgan ma'lumotlarni bekor qilmaslik")
+        parser.add_argument('--json', action='store_true', help="Natijani JSON ko'rinishida chiqarish")
+        parser.add_argument(
+            '--threads', type=int, default=0,
+            help="Checkout'ni shuncha oqimda parallel o'lchash (DB profillarini solishtirish uchun). "
+                 "Bu rejimda yozuvlar bekor qilinmaydi",
+        )
+
+    def handle(self, *args, **options):
+        names = options['scenarios'] or list(benchmarks.SCENARIOS)
+        unknown = set(names) - set(benchmarks.SCENARIOS)
+        if unknown:
+            raise CommandError(f"Noma'lum scenariy: {', '.join(sorted(unknown))}")
+
+        self.stdout.write(f"Baza: {benchmarks.describe_database()}")
+
+        if options['threads']:
+            try:
+                result = benchmarks.run_concurrent(
+                    'checkout', options['threads'], options['iterations'],
+                    basket_size=options['basket'], seed=options['seed'],
+                )
+            except LookupError as exc:
+                raise CommandError(str(exc))
+            if options['json']:
+                self.stdout.write(json.dumps(result, indent=2))
+                return
+            self.stdout.write(
+                f"{result['scenario']}: {result['ops']} ops, {result['errors']} xato {result['error_types']}, "
+                f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, {result['ops_per_sec']:.1f} ops/s"
+            )
+            return
+
+        results = []
+        with transaction.atomic():
+            try:
+                ctx = benchmarks.Context(basket_size=options['basket'], seed=options['seed'])
+            except LookupError as exc:
+                raise CommandError(str(exc))
+
+            for name in names:
+                results.append(benchmarks.run(name, ctx, options['iterations']))
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        header = f"{'scenariy':<20} {'ops':>6} {'q/op':>8} {'q max':>6} {'p50 ms':>9} {'p99 ms':>9} {'ops/s':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in results:
+            self.stdout.write(
+                f"{row['scenario']:<20} {row['ops']:>6} {row['queries_per_op']:>8.1f} {row['max_queries']:>6} "
+                f"{row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['ops_per_sec']:>9.1f}"
+            )
@@ -0,0 +1,42 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.models import AddProduct, Branch, Supplier, Worker
+from api.services.receiving import import_delivery, read_rows
+
+
+class Command(BaseCommand):
+    help = "Yetkazib berish faylini (CSV yoki XLSX: barcode, quantity, price) bitta kirim sifatida import qiladi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--branch', type=int, required=True)
+        parser.add_argument('--worker', type=int, required=True)
+        parser.add_argument('--supplier', type=int)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        branch = Branch.objects.filter(pk=options['branch']).first()
+        worker = Worker.objects.filter(pk=options['worker'], branch=branch).first()
+        if branch is None or worker is None:
+            raise CommandError("Filial yoki hodim topilmadi")
+
+        supplier = None
+        if options['supplier']:
+            supplier = Supplier.objects.filter(pk=options['supplier']).first()
+
+        try:
+            with open(options['path'], 'rb') as fh, transaction.atomic():
+                add_product = AddProduct.objects.create(branch=branch, worker=worker, supplier=supplier)
+                result = import_delivery(
+                    add_product, read_rows(fh, options['path']), batch_size=options['batch_size']
+                )
+        except FileNotFoundError:
+            raise CommandError(f"{options['path']} topilmadi")
+        except ValidationError as exc:
+            raise CommandError('\n'.join(exc.messages))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Kirim #{add_product.pk}: {result['items']} ta mahsulot, jami {result['total_price']}"
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.services.customers import merge_duplicates
+
+
+class Command(BaseCommand):
+    help = "Bir filialdagi telefon raqami bir xil mijozlarni birlashtiradi (savdolar va qarzlar bilan)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Faqat ko'rsatish, o'zgartirmaslik")
+
+    def handle(self, *args, **options):
+        merged = merge_duplicates(dry_run=options['dry_run'])
+
+        for duplicate, survivor in list(merged.items())[:50]:
+            self.stdout.write(f"#{duplicate} -> #{survivor}")
+
+        verb = "birlashtiriladi" if options['dry_run'] else "birlashtirildi"
+        self.stdout.write(self.style.SUCCESS(f"{len(merged)} ta dublikat {verb}"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.services import idempotency
+
+
+class Command(BaseCommand):
+    help = "Muddati o'tgan Idempotency-Key yozuvlarini o'chiradi (cron orqali davriy ishga tushiriladi)"
+
+    def handle(self, *args, **options):
+        count = idempotency.purge()
+        self.stdout.write(self.style.SUCCESS(f"{count} ta eski kalit o'chirildi"))
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import AddProductItem, Branch, Expense, History, Sale
+from api.services import alerts
+
+
+class Command(BaseCommand):
+    help = "Hisobot va admin ro'yxatlari so'rovlarining EXPLAIN rejasini chiqaradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=int, help="Filial id (standart: birinchi filial)")
+        parser.add_argument('--days', type=int, default=1, help="Hisobot oralig'i, kun")
+
+    def handle(self, *args, **options):
+        branch = Branch.objects.filter(pk=options['branch']) if options['branch'] else Branch.objects.order_by('pk')
+        branch = branch.first()
+        if branch is None:
+            raise CommandError("Filial topilmadi (avval seed_data ishga tushiring)")
+
+        end = timezone.now()
+        start = end - timedelta(days=options['days'])
+
+        queries = {
+            "DailyReport: savdolar": Sale.objects.filter(
+                branch=branch, sold_at__gte=start, sold_at__lte=end
+            ).values('total_price', 'discount'),
+            "DailyReport: kirimlar": AddProductItem.objects.filter(
+                Q(added_at__gte=start, added_at__lte=end), add_product__branch=branch
+            ).values('total_price'),
+            "DailyReport: harajatlar": Expense.objects.filter(
+                branch=branch, incurred_at__gte=start, incurred_at__lte=end
+            ).values('amount'),
+            "History changelist": History.objects.order_by('-changed_at')[:100],
+            "History changelist (filial)": History.objects.filter(branch=branch).order_by('-changed_at')[:100],
+            "History (filial, oraliq)": History.objects.filter(
+                branch=branch, changed_at__gte=start, changed_at__lte=end
+            ).order_by('-changed_at')[:100],
+            "Sale changelist": Sale.objects.order_by('-sold_at')[:100],
+            "Kam qolgan mahsulotlar (filial)": alerts.low_stock(branch),
+        }
+
+        for title, queryset in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
@@ -0,0 +1,37 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "QueryStatsMiddleware yig'gan statistikani (QUERY_STATS_FILE) jadval ko'rinishida chiqaradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=getattr(settings, 'QUERY_STATS_FILE', None))
+        parser.add_argument('--sort', default='avg_queries', choices=['avg_queries', 'avg_ms', 'avg_sql_ms', 'calls'])
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        if not options['file']:
+            raise CommandError("QUERY_STATS_FILE sozlanmagan, --file bilan ko'rsating")
+
+        try:
+            with open(options['file'], encoding='utf-8') as fh:
+                stats = json.load(fh)
+        except FileNotFoundError:
+            raise CommandError(f"{options['file']} topilmadi")
+
+        if options['json']:
+            self.stdout.write(json.dumps(stats, indent=2, sort_keys=True))
+            return
+
+        header = f"{'nomi':<40} {'calls':>7} {'q/call':>8} {'q max':>6} {'sql ms':>9} {'avg ms':>9} {'max ms':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        rows = sorted(stats.items(), key=lambda item: item[1][options['sort']], reverse=True)
+        for name, entry in rows:
+            self.stdout.write(
+                f"{name[:40]:<40} {entry['calls']:>7} {entry['avg_queries']:>8.1f} {entry['max_queries']:>6} "
+                f"{entry['avg_sql_ms']:>9.2f} {entry['avg_ms']:>9.2f} {entry['max_time'] * 1000:>9.2f}"
+            )
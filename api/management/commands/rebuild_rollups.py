@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Branch, HourlyRollup
+
+
+class Command(BaseCommand):
+    help = "Soatlik yig'indilarni (HourlyRollup) xom savdo, kirim va harajatlardan qayta quradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=int, help="Faqat shu filial uchun")
+
+    def handle(self, *args, **options):
+        branch = None
+        if options['branch']:
+            branch = Branch.objects.filter(pk=options['branch']).first()
+            if branch is None:
+                raise CommandError("Filial topilmadi")
+
+        count = HourlyRollup.rebuild(branch)
+        self.stdout.write(self.style.SUCCESS(f"{count} ta bucket qayta qurildi"))
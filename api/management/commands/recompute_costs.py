@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Branch
+from api.services.costing import recompute
+
+
+class Command(BaseCommand):
+    help = "Mahsulotlarning o'rtacha tannarxini barcha kirim va sotuvlardan qayta hisoblaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=int, help="Faqat shu filial (standart: hammasi)")
+        parser.add_argument(
+            '--sale-items', action='store_true',
+            help="Sotuv qatorlarining tannarxini (SaleItem.unit_cost/total_cost) ham qayta yozish",
+        )
+
+    def handle(self, *args, **options):
+        branch = None
+        if options['branch']:
+            branch = Branch.objects.filter(pk=options['branch']).first()
+            if branch is None:
+                raise CommandError("Filial topilmadi")
+
+        products, changed, items, skipped = recompute(branch, sale_items=options['sale_items'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{products} ta mahsulot qayta hisoblandi, {changed} tasida o'rtacha tannarx o'zgardi"
+            + (f", {items} ta sotuv qatori yangilandi" if options['sale_items'] else "")
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"{len(skipped)} ta mahsulot o'tkazib yuborildi: kirim va sotuvlar joriy qoldiqqa mos emas "
+                f"(boshlang'ich qoldiq tannarxi noma'lum): {', '.join(map(str, skipped[:20]))}"
+                + (" ..." if len(skipped) > 20 else "")
+            ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from api.services.debts import reconcile
+
+
+class Command(BaseCommand):
+    help = "Mijozlar qarzini ledger (DebtEntry) dan qayta hisoblaydi va keshlangan balans bilan farqni ko'rsatadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=int, help="Faqat shu filial mijozlari")
+        parser.add_argument('--fix', action='store_true', help="Farqlarni Customer.debt ga yozish")
+        parser.add_argument('--show', type=int, default=20, help="Nechta farqni chiqarish")
+
+    def handle(self, *args, **options):
+        checked, drifted = reconcile(options['branch'], fix=options['fix'])
+
+        for customer, expected in drifted[:options['show']]:
+            self.stdout.write(
+                f"#{customer.pk} {customer.name}: kesh {customer.debt}, ledger {expected} "
+                f"(farq {customer.debt - expected})"
+            )
+
+        style = self.style.WARNING if drifted else self.style.SUCCESS
+        self.stdout.write(style(
+            f"{checked} ta mijoz tekshirildi, {len(drifted)} ta farq"
+            + (" tuzatildi" if drifted and options['fix'] else "")
+        ))
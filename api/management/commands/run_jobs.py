@@ -0,0 +1,44 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services import jobs
+
+
+class Command(BaseCommand):
+    help = "Fon vazifalari navbatini (Job) bajaradi: hisobotlar, eksportlar, qayta hisoblashlar"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Navbat bo'shaguncha ishlab, chiqib ketish")
+        parser.add_argument('--sleep', type=float, default=2.0, help="Navbat bo'sh bo'lsa kutish, soniya")
+        parser.add_argument('--prune-days', type=int, help="Shu kundan eski tugagan vazifalarni o'chirish va chiqish")
+
+    def handle(self, *args, **options):
+        if options['prune_days'] is not None:
+            count = jobs.prune(options['prune_days'])
+            self.stdout.write(self.style.SUCCESS(f"{count} ta eski vazifa o'chirildi"))
+            return
+
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Ishchi {worker} ishga tushdi")
+
+        try:
+            while True:
+                jobs.requeue_stale()
+                job = jobs.claim(worker)
+                if job is None:
+                    if options['once']:
+                        return
+                    time.sleep(options['sleep'])
+                    continue
+
+                started = time.monotonic()
+                ok = jobs.run(job)
+                style = self.style.SUCCESS if ok else self.style.ERROR
+                self.stdout.write(style(
+                    f"{job.name} #{job.pk}: {'tayyor' if ok else 'xato'} ({time.monotonic() - started:.1f} s)"
+                ))
+        except KeyboardInterrupt:
+            self.stdout.write("To'xtatildi")
@@ -0,0 +1,191 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import (
+    AddProduct, AddProductItem, Branch, Customer, DebtEntry, Expense, History,
+    HourlyRollup, Product, Sale, SaleItem, Worker,
+)
+from api.models.sale import normalize_phone
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    # Seed paytida auto_now_add vaqtni "hozir"ga almashtirmasligi uchun
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field, _ in saved:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in saved:
+            field.auto_now_add = value
+
+
+class Command(BaseCommand):
+    help = "Benchmark uchun filiallar, mahsulotlar, mijozlar va bir necha oylik savdolarni yaratadi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branches', type=int, default=3)
+        parser.add_argument('--products', type=int, default=500, help="Har bir filialga")
+        parser.add_argument('--customers', type=int, default=200, help="Har bir filialga")
+        parser.add_argument('--workers', type=int, default=5, help="Har bir filialga")
+        parser.add_argument('--months', type=int, default=3)
+        parser.add_argument('--sales-per-day', type=int, default=100, help="Har bir filialga")
+        parser.add_argument('--max-items', type=int, default=5, help="Bitta savdodagi eng ko'p mahsulot")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        timestamps = [
+            model._meta.get_field(name) for model, name in (
+                (Sale, 'sold_at'), (SaleItem, 'sold_at'), (History, 'changed_at'),
+                (AddProduct, 'added_at'), (AddProductItem, 'added_at'), (Expense, 'incurred_at'),
+                (DebtEntry, 'created_at'),
+            )
+        ]
+
+        with explicit_timestamps(*timestamps):
+            for index in range(options['branches']):
+                with transaction.atomic():
+                    self.seed_branch(index, options)
+
+        buckets = HourlyRollup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Tayyor: {buckets} ta soatlik bucket"))
+
+    def seed_branch(self, index, options):
+        rng = self.rng
+        branch = Branch.objects.create(name=f"Seed filial {index + 1}", location="Seed")
+
+        workers = Worker.objects.bulk_create([
+            Worker(branch=branch, name=f"Hodim {index}-{i}", phone_number=f"90{i:07d}", position="Kassir")
+            for i in range(options['workers'])
+        ])
+
+        products = [
+            Product(
+                branch=branch,
+                name=f"Mahsulot {index}-{i}",
+                barcode=f"S{index:03d}{i:09d}",
+                quantity=Decimal('1000000'),
+                cost_price=Decimal(rng.randint(1, 200) * 500),
+                sale_price=Decimal(rng.randint(1, 200) * 600),
+            )
+            for i in range(options['products'])
+        ]
+        for product in products:
+            product.average_cost = product.cost_price
+        products = Product.objects.bulk_create(products, batch_size=self.batch_size)
+
+        customers = Customer.objects.bulk_create([
+            Customer(
+                branch=branch, name=f"Mijoz {index}-{i}", phone_number=f"99{index:02d}{i:06d}",
+                phone_key=normalize_phone(f"99{index:02d}{i:06d}"),
+            )
+            for i in range(options['customers'])
+        ], batch_size=self.batch_size)
+
+        now = timezone.now()
+        days = options['months'] * 30
+        debts = {}
+        sales_count = 0
+
+        for day in range(days, 0, -1):
+            day_start = now - timedelta(days=day)
+
+            sales, items, histories = [], [], []
+            for _ in range(options['sales_per_day']):
+                sold_at = day_start + timedelta(seconds=rng.randint(0, 86399))
+                worker = rng.choice(workers)
+                basket = rng.sample(products, rng.randint(1, options['max_items']))
+
+                sale_items = [
+                    SaleItem(product=p, quantity=Decimal(rng.randint(1, 5)), sold_at=sold_at)
+                    for p in basket
+                ]
+                total = Decimal('0')
+                for item in sale_items:
+                    item.total_price = item.product.sale_price * item.quantity
+                    item.unit_cost = item.product.average_cost
+                    item.total_cost = item.unit_cost * item.quantity
+                    total += item.total_price
+
+                amount = total if rng.random() < 0.9 else total * Decimal('0.95')
+                customer = rng.choice(customers) if customers and rng.random() < 0.1 else None
+                sale = Sale(
+                    branch=branch, worker=worker, customer=customer,
+                    total_price=total, amount=amount, discount=total - amount,
+                    sold_at=sold_at,
+                )
+                if customer is not None:
+                    debts[customer.pk] = debts.get(customer.pk, Decimal('0')) + amount
+
+                sales.append((sale, sale_items))
+                histories.extend(
+                    History(
+                        branch=branch, worker=worker, product=item.product,
+                        change_type="Sotildi", quantity_changed=item.quantity, changed_at=sold_at,
+                    )
+                    for item in sale_items
+                )
+
+            Sale.objects.bulk_create([sale for sale, _ in sales], batch_size=self.batch_size)
+            for sale, sale_items in sales:
+                for item in sale_items:
+                    item.sale = sale
+                items.extend(sale_items)
+            SaleItem.objects.bulk_create(items, batch_size=self.batch_size)
+            DebtEntry.objects.bulk_create([
+                DebtEntry(
+                    customer=sale.customer, sale=sale, kind=DebtEntry.CHARGE,
+                    amount=sale.amount, created_at=sale.sold_at,
+                )
+                for sale, _ in sales if sale.customer is not None
+            ], batch_size=self.batch_size)
+            History.objects.bulk_create(histories, batch_size=self.batch_size)
+            sales_count += len(sales)
+
+            self.seed_receiving(branch, workers, products, day_start)
+
+        for customer in customers:
+            customer.debt = debts.get(customer.pk, Decimal('0'))
+        Customer.objects.bulk_update(customers, ['debt'], batch_size=self.batch_size)
+
+        self.stdout.write(f"{branch.name}: {len(products)} mahsulot, {sales_count} savdo")
+
+    def seed_receiving(self, branch, workers, products, day_start):
+        rng = self.rng
+        worker = rng.choice(workers)
+        added_at = day_start + timedelta(hours=8)
+
+        add_product = AddProduct.objects.create(branch=branch, worker=worker, added_at=added_at)
+        items = []
+        for product in rng.sample(products, min(20, len(products))):
+            quantity = Decimal(rng.randint(10, 100))
+            items.append(AddProductItem(
+                add_product=add_product, product=product,
+                input_quantity=quantity, added_quantity=quantity,
+                price=product.cost_price, total_price=product.cost_price * quantity,
+                added_at=added_at,
+            ))
+        AddProductItem.objects.bulk_create(items)
+        History.objects.bulk_create([
+            History(
+                branch=branch, worker=worker, product=item.product,
+                change_type="Qo'shildi", quantity_changed=item.added_quantity, changed_at=added_at,
+            )
+            for item in items
+        ])
+
+        Expense.objects.create(
+            branch=branch, worker=worker, category='boshqa xarajatlar',
+            amount=Decimal(rng.randint(1, 100) * 1000), incurred_at=day_start + timedelta(hours=18),
+        )
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Branch, StockSnapshot
+from api.services.snapshots import take_snapshot
+
+
+class Command(BaseCommand):
+    help = "Har bir filial uchun mahsulot qoldiqlarining snapshotini oladi (cron orqali davriy ishga tushiriladi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--branch', type=int, help="Faqat shu filial uchun")
+        parser.add_argument('--prune-days', type=int, help="Shundan eski snapshotlarni o'chirish")
+
+    def handle(self, *args, **options):
+        branches = Branch.objects.order_by('pk')
+        if options['branch']:
+            branches = branches.filter(pk=options['branch'])
+
+        for branch in branches:
+            snapshot = take_snapshot(branch)
+            self.stdout.write(f"{branch.name}: snapshot #{snapshot.pk}, {snapshot.items.count()} mahsulot")
+
+        if options['prune_days']:
+            cutoff = timezone.now() - timedelta(days=options['prune_days'])
+            deleted, _ = StockSnapshot.objects.filter(taken_at__lt=cutoff).delete()
+            self.stdout.write(f"{deleted} ta eski yozuv o'chirildi")
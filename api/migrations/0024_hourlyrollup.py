@@ -0,0 +1,66 @@
+# Generated by Django 6.0 on 2026-10-17 14:43
+
+import django.db.models.deletion
+from decimal import Decimal
+from datetime import timezone as dt_timezone
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncHour
+
+
+def backfill_rollups(apps, schema_editor):
+    HourlyRollup = apps.get_model('api', 'HourlyRollup')
+    Sale = apps.get_model('api', 'Sale')
+    AddProductItem = apps.get_model('api', 'AddProductItem')
+    Expense = apps.get_model('api', 'Expense')
+
+    sources = (
+        (Sale.objects, 'branch_id', 'sold_at', {'sales_total': 'total_price', 'discounts_total': 'discount'}),
+        (AddProductItem.objects, 'add_product__branch_id', 'added_at', {'purchase_total': 'total_price'}),
+        (Expense.objects, 'branch_id', 'incurred_at', {'expense_total': 'amount'}),
+    )
+
+    buckets = {}
+    for manager, branch_field, time_field, sums in sources:
+        rows = (
+            manager.filter(**{f'{branch_field}__isnull': False})
+            .annotate(bucket=TruncHour(time_field, tzinfo=dt_timezone.utc))
+            .values(branch_field, 'bucket')
+            .annotate(**{name: Sum(field) for name, field in sums.items()})
+            .order_by()
+        )
+        for row in rows:
+            bucket = buckets.setdefault((row[branch_field], row['bucket']), {})
+            for name in sums:
+                bucket[name] = row[name] or 0
+
+    HourlyRollup.objects.bulk_create(
+        [HourlyRollup(branch_id=branch_id, hour=hour, **values) for (branch_id, hour), values in buckets.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_alter_addproductitem_total_price_alter_customer_debt_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Soat')),
+                ('sales_total', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=18, verbose_name='Savdo')),
+                ('discounts_total', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=18, verbose_name='Chegirmalar')),
+                ('purchase_total', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=18, verbose_name='Sotib olishlar')),
+                ('expense_total', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=18, verbose_name='Harajatlar')),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='api.branch', verbose_name='Filial')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('branch', 'hour'), name='unique_rollup_branch_hour')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-17 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_hourlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='addproduct',
+            index=models.Index(fields=['branch', 'added_at'], name='addproduct_branch_added_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='addproduct',
+            index=models.Index(fields=['-added_at'], name='addproduct_added_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='addproductitem',
+            index=models.Index(fields=['add_product', 'added_at'], name='addproductitem_added_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyreport',
+            index=models.Index(fields=['branch', '-created_at'], name='dailyreport_branch_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyreport',
+            index=models.Index(fields=['-created_at'], name='dailyreport_created_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['branch', 'incurred_at'], name='expense_branch_incurred_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='history',
+            index=models.Index(fields=['branch', 'changed_at'], name='history_branch_changed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='history',
+            index=models.Index(fields=['-changed_at'], name='history_changed_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['branch', 'sold_at'], name='sale_branch_sold_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['-sold_at'], name='sale_sold_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-17 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_branch_time_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(verbose_name='Olingan vaqti')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockSnapshotItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12, verbose_name='Miqdor')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='history',
+            index=models.Index(fields=['product', 'changed_at'], name='history_product_changed_idx'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='branch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='api.branch', verbose_name='Filial'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshotitem',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot_items', to='api.product', verbose_name='Mahsulot'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshotitem',
+            name='snapshot',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='api.stocksnapshot'),
+        ),
+        migrations.AddIndex(
+            model_name='stocksnapshot',
+            index=models.Index(fields=['branch', 'taken_at'], name='snapshot_branch_taken_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshotitem',
+            constraint=models.UniqueConstraint(fields=('product', 'snapshot'), name='unique_snapshot_product'),
+        ),
+    ]
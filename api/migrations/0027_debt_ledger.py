@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-17 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def opening_balances(apps, schema_editor):
+    # Mavjud qarzlar ledgerga boshlang'ich qoldiq sifatida ko'chiriladi
+    Customer = apps.get_model('api', 'Customer')
+    DebtEntry = apps.get_model('api', 'DebtEntry')
+
+    DebtEntry.objects.bulk_create(
+        [
+            DebtEntry(customer_id=pk, kind='opening', amount=debt)
+            for pk, debt in Customer.objects.exclude(debt=0).values_list('pk', 'debt').iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_stock_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DebtEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('opening', 'Boshlang‘ich qoldiq'), ('charge', 'Qarz'), ('payment', 'To‘lov'), ('reversal', 'Bekor qilish')], max_length=10, verbose_name='Turi')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='Summa')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Vaqti')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='debt_entries', to='api.customer', verbose_name='Qarzdor')),
+                ('sale', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='debt_entries', to='api.sale', verbose_name='Savdo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['customer', 'created_at'], name='debtentry_customer_idx')],
+            },
+        ),
+        migrations.RunPython(opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 6.0 on 2026-10-17 17:40
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F
+
+
+def normalize_phone(phone):
+    digits = ''.join(ch for ch in str(phone or '') if ch.isdigit())
+    if len(digits) == 9:
+        digits = '998' + digits
+    return digits or None
+
+
+def fill_phone_keys(apps, schema_editor):
+    # Unique constraint qo'shilishidan oldin dublikatlar birlashtiriladi
+    Customer = apps.get_model('api', 'Customer')
+    Sale = apps.get_model('api', 'Sale')
+    DebtEntry = apps.get_model('api', 'DebtEntry')
+
+    survivors = {}
+    merged = {}
+    extra_debt = defaultdict(Decimal)
+    keyed = []
+
+    for pk, branch_id, phone_number, debt in Customer.objects.order_by('pk').values_list(
+        'pk', 'branch_id', 'phone_number', 'debt'
+    ):
+        key = normalize_phone(phone_number)
+        if key is None:
+            continue
+        survivor = survivors.setdefault((branch_id, key), pk)
+        if survivor != pk:
+            merged[pk] = survivor
+            extra_debt[survivor] += debt
+        else:
+            keyed.append(Customer(pk=pk, phone_key=key))
+
+    for duplicate, survivor in merged.items():
+        Sale.objects.filter(customer_id=duplicate).update(customer_id=survivor)
+        DebtEntry.objects.filter(customer_id=duplicate).update(customer_id=survivor)
+    for survivor, amount in extra_debt.items():
+        Customer.objects.filter(pk=survivor).update(debt=F('debt') + amount)
+    Customer.objects.filter(pk__in=list(merged)).delete()
+
+    Customer.objects.bulk_update(keyed, ['phone_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_debt_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='phone_key',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True, verbose_name='Telefon kaliti'),
+        ),
+        migrations.RunPython(fill_phone_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_customer_phone_key'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(fields=('branch', 'phone_key'), name='unique_customer_branch_phone'),
+        ),
+    ]
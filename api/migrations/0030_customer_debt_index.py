@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_customer_phone_key_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['-debt'], name='customer_debt_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-17 18:40
+
+from decimal import Decimal
+from datetime import timezone as dt_timezone
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncHour
+
+
+def backfill_items_sold(apps, schema_editor):
+    HourlyRollup = apps.get_model('api', 'HourlyRollup')
+    SaleItem = apps.get_model('api', 'SaleItem')
+
+    rows = (
+        SaleItem.objects.filter(sale__branch_id__isnull=False)
+        .annotate(bucket=TruncHour('sold_at', tzinfo=dt_timezone.utc))
+        .values('sale__branch_id', 'bucket')
+        .annotate(items=Sum('quantity'))
+        .order_by()
+    )
+    for row in rows.iterator():
+        updated = HourlyRollup.objects.filter(
+            branch_id=row['sale__branch_id'], hour=row['bucket']
+        ).update(items_sold=row['items'])
+        if not updated:
+            HourlyRollup.objects.create(
+                branch_id=row['sale__branch_id'], hour=row['bucket'], items_sold=row['items']
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0030_customer_debt_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hourlyrollup',
+            name='items_sold',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0'), max_digits=18, verbose_name='Sotilgan mahsulotlar'),
+        ),
+        migrations.RunPython(backfill_items_sold, migrations.RunPython.noop),
+    ]
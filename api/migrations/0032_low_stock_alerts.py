@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-17 19:10
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0031_rollup_items_sold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12, verbose_name='Qoldiq')),
+                ('reorder_level', models.DecimalField(decimal_places=3, max_digits=12, verbose_name='Minimal qoldiq')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Vaqti')),
+                ('resolved_at', models.DateTimeField(blank=True, null=True, verbose_name='Yopilgan vaqti')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='reorder_level',
+            field=models.DecimalField(decimal_places=3, default=Decimal('0'), max_digits=12, verbose_name='Minimal qoldiq'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('quantity__lte', models.F('reorder_level'))), fields=['branch', 'quantity'], name='product_low_stock_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockalert',
+            name='branch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='api.branch', verbose_name='Filial'),
+        ),
+        migrations.AddField(
+            model_name='stockalert',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='api.product', verbose_name='Mahsulot'),
+        ),
+        migrations.AddIndex(
+            model_name='stockalert',
+            index=models.Index(condition=models.Q(('resolved_at__isnull', True)), fields=['branch', '-created_at'], name='stockalert_open_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-17 19:50
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0032_low_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Vazifa')),
+                ('params', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Parametrlar')),
+                ('key', models.CharField(editable=False, max_length=64, verbose_name='Kalit')),
+                ('status', models.CharField(choices=[('pending', 'Navbatda'), ('running', 'Bajarilmoqda'), ('done', 'Tayyor'), ('failed', 'Xato')], default='pending', max_length=10, verbose_name='Holati')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Bajarildi (%)')),
+                ('message', models.CharField(blank=True, max_length=255, verbose_name='Xabar')),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Natija')),
+                ('error', models.TextField(blank=True, verbose_name='Xato')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Urinishlar')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Ishchi')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan vaqti')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Boshlangan vaqti')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Tugagan vaqti')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key', '-created_at'], name='job_key_idx'), models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='job_pending_idx')],
+            },
+        ),
+    ]
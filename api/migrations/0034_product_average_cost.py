@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-17 20:40
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F
+
+
+def seed_average_cost(apps, schema_editor):
+    # Boshlang'ich qiymat; aniq tarixiy qiymat uchun: manage.py recompute_costs
+    Product = apps.get_model('api', 'Product')
+    Product.objects.update(average_cost=F('cost_price'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0033_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='average_cost',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0'), editable=False, max_digits=14, verbose_name="O'rtacha tannarx"),
+        ),
+        migrations.RunPython(seed_average_cost, migrations.RunPython.noop),
+    ]
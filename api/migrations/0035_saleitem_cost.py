@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-17 21:15
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def backfill_costs(apps, schema_editor):
+    # Eski sotuvlar uchun sotuv paytidagi tannarx ma'lum emas: joriy o'rtacha olinadi
+    Product = apps.get_model('api', 'Product')
+    SaleItem = apps.get_model('api', 'SaleItem')
+
+    SaleItem.objects.update(unit_cost=Subquery(
+        Product.objects.filter(pk=OuterRef('product_id')).values('average_cost')[:1]
+    ))
+    SaleItem.objects.update(total_cost=F('quantity') * F('unit_cost'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0034_product_average_cost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saleitem',
+            name='total_cost',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=18, verbose_name='Tannarx'),
+        ),
+        migrations.AddField(
+            model_name='saleitem',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0'), editable=False, max_digits=14, verbose_name='Tannarx (dona)'),
+        ),
+        migrations.RunPython(backfill_costs, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='saleitem',
+            index=models.Index(fields=['sold_at'], name='saleitem_sold_idx'),
+        ),
+    ]
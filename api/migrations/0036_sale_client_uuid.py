@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-17 15:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0035_saleitem_cost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='client_uuid',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True, verbose_name='Kassa identifikatori'),
+        ),
+        migrations.AlterField(
+            model_name='sale',
+            name='sold_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Sotish vaqti'),
+        ),
+        migrations.AlterField(
+            model_name='saleitem',
+            name='sold_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Sotish vaqti'),
+        ),
+    ]
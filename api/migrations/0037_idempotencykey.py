@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-17 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0036_sale_client_uuid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50, verbose_name='Yo‘nalish')),
+                ('key', models.CharField(max_length=255, verbose_name='Kalit')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='So‘rov xeshi')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Javob kodi')),
+                ('response', models.TextField(verbose_name='Javob')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan vaqti')),
+                ('expires_at', models.DateTimeField(verbose_name='Amal qilish muddati')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='idempotency_expires_idx')],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key'), name='idempotency_scope_key_uniq')],
+            },
+        ),
+    ]
@@ -1,2 +1,5 @@
 from .branchstock import *
-from .sale import *
\ No newline at end of file
+from .sale import *
+from .rollup import *
+from .job import *
+from .idempotency import *
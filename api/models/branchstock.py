@@ -1,6 +1,10 @@
+import threading
+from contextlib import contextmanager
 from django.db import models, transaction
 from decimal import Decimal
 from django.db.models import F
+from .rollup import HourlyRollup
+from api.instrumentation import instrumented
 
 class Branch(models.Model):
     name = models.CharField(max_length=100, verbose_name="Filial nomi")
@@ -55,14 +59,30 @@ class Product(models.Model):
     barcode = models.CharField(max_length=50, unique=True, null=True, blank=True, verbose_name="Shtrixkod")
     quantity = models.DecimalField(max_digits=12, decimal_places=3, default=Decimal('0'), verbose_name="Mavjud miqdor (dona)")
     cost_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Sotib olish narxi")
+    # Kirimlar bo'yicha o'rtacha tannarx (cost_price - oxirgi kirim narxi)
+    average_cost = models.DecimalField(max_digits=14, decimal_places=4, default=Decimal('0'), editable=False, verbose_name="O'rtacha tannarx")
     sale_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Sotish narxi")
 
     base_unit = models.CharField(max_length=10, choices=UNIT_CHOICES, default='pcs', verbose_name="Qabul birligi")
     kg_to_pcs = models.DecimalField(max_digits=10, decimal_places=3, null=True, blank=True, verbose_name="1 kg nechta dona")
+    reorder_level = models.DecimalField(max_digits=12, decimal_places=3, default=Decimal('0'), verbose_name="Minimal qoldiq")
+
+    class Meta:
+        indexes = [
+            # 🔹 Faqat kam qolgan mahsulotlar indeksda: filial bo'yicha ro'yxat index scan
+            models.Index(
+                fields=['branch', 'quantity'], name='product_low_stock_idx',
+                condition=models.Q(quantity__lte=models.F('reorder_level')),
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def is_low_stock(self):
+        return self.quantity <= self.reorder_level
+
 
 
 class AddProduct(models.Model):
@@ -71,6 +91,12 @@ class AddProduct(models.Model):
     supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name='products', null=True, blank=True, verbose_name="Yetkazib beruvchi")
     added_at = models.DateTimeField(auto_now_add=True, verbose_name="Qo'shilgan vaqti")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'added_at'], name='addproduct_branch_added_idx'),
+            models.Index(fields=['-added_at'], name='addproduct_added_desc_idx'),
+        ]
+
     def __str__(self):
         return f"Added {self.added_at}"
 
@@ -79,6 +105,12 @@ class AddProduct(models.Model):
 
         super().save(*args, **kwargs)
 
+    @transaction.atomic
+    def delete(self, *args, **kwargs):
+        # Har bir item o'chganda yoziladigan History bitta INSERT bo'ladi
+        with History.objects.batch():
+            return super().delete(*args, **kwargs)
+
 
 class AddProductItem(models.Model):
     add_product = models.ForeignKey(
@@ -121,16 +153,25 @@ class AddProductItem(models.Model):
 
     added_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['add_product', 'added_at'], name='addproductitem_added_idx'),
+        ]
+
     def __str__(self):
         return f"{self.product.name} +{self.added_quantity}"
 
+    @instrumented('AddProductItem.save')
     @transaction.atomic
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         old_quantity = Decimal('0')
+        old_total = Decimal('0')
 
         if not is_new:
-            old_quantity = AddProductItem.objects.get(pk=self.pk).added_quantity
+            old_item = AddProductItem.objects.get(pk=self.pk)
+            old_quantity = old_item.added_quantity
+            old_total = old_item.total_price
 
         if self.product.base_unit == 'kg':
             if not self.product.kg_to_pcs:
@@ -157,11 +198,18 @@ class AddProductItem(models.Model):
 
         super().save(*args, **kwargs)
 
+        HourlyRollup.apply(
+            self.add_product.branch_id, self.added_at,
+            purchase_total=self.total_price - old_total,
+        )
+
+        from api.services import costing, stock
+
         delta = self.added_quantity - old_quantity
-        self.product.quantity = F('quantity') + delta
-        self.product.save(update_fields=['quantity'])
+        costing.receive({self.product_id: (delta, self.total_price - old_total)})
+        stock.put({self.product_id: delta})
 
-        History.objects.create(
+        History.objects.record(
             branch=self.add_product.branch,
             worker=self.add_product.worker,
             product=self.product,
@@ -170,7 +218,67 @@ class AddProductItem(models.Model):
         )
 
 
+_history_buffer = threading.local()
+
+
+class HistoryQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise ValueError("History yozuvini o‘zgartirish mumkin emas")
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        raise ValueError("History yozuvini o‘zgartirish mumkin emas")
+
+    # 🔹 Qoldiqqa ta'siri bo'yicha ishorali yig'indi (kirim +, sotuv va o'chirish -)
+    def signed_total(self):
+        signed = models.Case(
+            *[
+                models.When(change_type=change_type, then=F('quantity_changed') * sign)
+                for change_type, sign in History.SIGNS.items()
+            ],
+            default=Decimal('0'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=3),
+        )
+        return self.aggregate(total=models.Sum(signed))['total'] or Decimal('0')
+
+
+class HistoryManager(models.Manager.from_queryset(HistoryQuerySet)):
+    # 🔹 batch() ichida record() qilingan yozuvlar yig'ib boriladi va blok
+    # oxirida (hali chaqiruvchining tranzaksiyasi ichida) bitta bulk_create
+    # bilan yoziladi. batch() dan tashqarida record() darhol yozadi.
+    @contextmanager
+    def batch(self):
+        if getattr(_history_buffer, 'entries', None) is not None:
+            yield
+            return
+
+        _history_buffer.entries = []
+        try:
+            yield
+            entries = _history_buffer.entries
+        finally:
+            _history_buffer.entries = None
+
+        if entries:
+            self.bulk_create(entries)
+
+    def record(self, **fields):
+        entry = self.model(**fields)
+        entries = getattr(_history_buffer, 'entries', None)
+        if entries is None:
+            self.bulk_create([entry])
+        else:
+            entries.append(entry)
+        return entry
+
+
 class History(models.Model):
+    SIGNS = {
+        "Qo'shildi": 1,
+        "O'chirildi": -1,
+        "Sotildi": -1,
+        "Sotuv bekor qilindi": 1,
+    }
+
     branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='histories', verbose_name="Filial")
     worker = models.ForeignKey(Worker, on_delete=models.CASCADE, related_name='histories', null=True, blank=True, verbose_name="Hodim")
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='histories', verbose_name="Mahsulot")
@@ -185,6 +293,15 @@ class History(models.Model):
 
     changed_at = models.DateTimeField(auto_now_add=True, verbose_name="O'zgarish vaqti")
 
+    objects = HistoryManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'changed_at'], name='history_branch_changed_idx'),
+            models.Index(fields=['-changed_at'], name='history_changed_desc_idx'),
+            models.Index(fields=['product', 'changed_at'], name='history_product_changed_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if self.pk:
             raise ValueError("History yozuvini o‘zgartirish mumkin emas")
@@ -195,6 +312,51 @@ class History(models.Model):
     #     raise ValueError("History yozuvini o‘chirish mumkin emas")
 
 
+class StockSnapshot(models.Model):
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='stock_snapshots', verbose_name="Filial")
+    taken_at = models.DateTimeField(verbose_name="Olingan vaqti")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'taken_at'], name='snapshot_branch_taken_idx'),
+        ]
+
+    def __str__(self):
+        return f"Qoldiq {self.taken_at}"
+
+
+class StockSnapshotItem(models.Model):
+    snapshot = models.ForeignKey(StockSnapshot, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='snapshot_items', verbose_name="Mahsulot")
+    quantity = models.DecimalField(max_digits=12, decimal_places=3, verbose_name="Miqdor")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'snapshot'], name='unique_snapshot_product'),
+        ]
+
+
+class StockAlert(models.Model):
+    # 🔹 Qoldiq minimal darajadan pastga tushgan payt. Qoldiq yana oshganda yopiladi.
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='stock_alerts', verbose_name="Filial")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_alerts', verbose_name="Mahsulot")
+    quantity = models.DecimalField(max_digits=12, decimal_places=3, verbose_name="Qoldiq")
+    reorder_level = models.DecimalField(max_digits=12, decimal_places=3, verbose_name="Minimal qoldiq")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Vaqti")
+    resolved_at = models.DateTimeField(null=True, blank=True, verbose_name="Yopilgan vaqti")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['branch', '-created_at'], name='stockalert_open_idx',
+                condition=models.Q(resolved_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.quantity} / {self.reorder_level}"
+
+
 class Expense(models.Model):
     EXPENSE_CATEGORIES = [
         ('do\'kon xarajatlari', 'Do\'kon xarajatlari'),
@@ -208,5 +370,27 @@ class Expense(models.Model):
     description = models.TextField(blank=True, null=True, verbose_name="Izoh")
     incurred_at = models.DateTimeField(auto_now_add=True, verbose_name="Olish vaqti")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'incurred_at'], name='expense_branch_incurred_idx'),
+        ]
+
     def __str__(self):
-        return f"Harajat {self.id} - {self.amount}"
\ No newline at end of file
+        return f"Harajat {self.id} - {self.amount}"
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        old = None
+        if self.pk is not None:
+            old = Expense.objects.filter(pk=self.pk).values('branch_id', 'amount', 'incurred_at').first()
+
+        super().save(*args, **kwargs)
+
+        amount = Decimal(self.amount)
+        if old is not None:
+            if old['branch_id'] == self.branch_id:
+                amount -= old['amount']
+            else:
+                HourlyRollup.apply(old['branch_id'], old['incurred_at'], expense_total=-old['amount'])
+
+        HourlyRollup.apply(self.branch_id, self.incurred_at, expense_total=amount)
\ No newline at end of file
@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    # 🔹 Mijoz yuborgan Idempotency-Key va shu so'rovga berilgan javob.
+    # Qayta yuborilgan so'rov javobni shu yerdan oladi, sotuv/kirim qayta yozilmaydi.
+    scope = models.CharField(max_length=50, verbose_name="Yo‘nalish")
+    key = models.CharField(max_length=255, verbose_name="Kalit")
+    fingerprint = models.CharField(max_length=64, verbose_name="So‘rov xeshi")
+    status_code = models.PositiveSmallIntegerField(verbose_name="Javob kodi")
+    response = models.TextField(verbose_name="Javob")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqti")
+    expires_at = models.DateTimeField(verbose_name="Amal qilish muddati")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='idempotency_scope_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}: {self.key}"
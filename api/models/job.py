@@ -0,0 +1,53 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, "Navbatda"),
+        (RUNNING, "Bajarilmoqda"),
+        (DONE, "Tayyor"),
+        (FAILED, "Xato"),
+    )
+
+    # 🔹 Og'ir ishlar (hisobot, eksport, qayta hisoblash) uchun bazadagi navbat.
+    # run_jobs buyrug'i navbatdan oladi; key bir xil vazifani qayta ishlatish uchun.
+    name = models.CharField(max_length=50, verbose_name="Vazifa")
+    params = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder, verbose_name="Parametrlar")
+    key = models.CharField(max_length=64, editable=False, verbose_name="Kalit")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="Holati")
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="Bajarildi (%)")
+    message = models.CharField(max_length=255, blank=True, verbose_name="Xabar")
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Natija")
+    error = models.TextField(blank=True, verbose_name="Xato")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Urinishlar")
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Ishchi")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqti")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Boshlangan vaqti")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan vaqti")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['key', '-created_at'], name='job_key_idx'),
+            models.Index(
+                fields=['created_at'], name='job_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+    # Boshqa maydonlarni qayta yozmaslik uchun faqat UPDATE
+    def set_progress(self, progress=None, message=None):
+        fields = {}
+        if progress is not None:
+            fields['progress'] = self.progress = max(0, min(int(progress), 100))
+        if message is not None:
+            fields['message'] = self.message = message[:255]
+        if fields:
+            Job.objects.filter(pk=self.pk).update(**fields)
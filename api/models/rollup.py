@@ -0,0 +1,108 @@
+from datetime import timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Sum
+from django.db.models.functions import TruncHour
+
+from api.services import live
+
+ONE_HOUR = timedelta(hours=1)
+
+
+def floor_hour(value):
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(value):
+    hour = floor_hour(value)
+    return hour if hour == value else hour + ONE_HOUR
+
+
+class HourlyRollup(models.Model):
+    # 🔹 Filial bo'yicha soatlik yig'indilar. Sale, SaleItem, AddProductItem va
+    # Expense yozilganda farqi (delta) qo'shib boriladi, hisobotlar esa xom
+    # qatorlarni emas, shu bucketlarni yig'adi.
+    branch = models.ForeignKey('api.Branch', on_delete=models.CASCADE, related_name='rollups', verbose_name="Filial")
+    hour = models.DateTimeField(verbose_name="Soat")
+
+    sales_total = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0'), verbose_name="Savdo")
+    discounts_total = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0'), verbose_name="Chegirmalar")
+    purchase_total = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0'), verbose_name="Sotib olishlar")
+    expense_total = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0'), verbose_name="Harajatlar")
+    items_sold = models.DecimalField(max_digits=18, decimal_places=3, default=Decimal('0'), verbose_name="Sotilgan mahsulotlar")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['branch', 'hour'], name='unique_rollup_branch_hour'),
+        ]
+
+    def __str__(self):
+        return f"{self.branch_id}: {self.hour}"
+
+    @classmethod
+    def apply(cls, branch_id, at, **deltas):
+        deltas = {name: Decimal(value) for name, value in deltas.items() if value}
+        if not branch_id or not deltas:
+            return
+
+        hour = floor_hour(at)
+        bucket = cls.objects.filter(branch_id=branch_id, hour=hour)
+        changes = {name: F(name) + value for name, value in deltas.items()}
+
+        # Jonli dashboard faqat commit bo'lgan o'zgarishlarni ko'radi
+        live.record(branch_id, at, deltas)
+
+        if bucket.update(**changes):
+            return
+
+        try:
+            with transaction.atomic():
+                cls.objects.create(branch_id=branch_id, hour=hour, **deltas)
+        except IntegrityError:
+            # Parallel tranzaksiya bucketni bizdan oldin yaratdi
+            bucket.update(**changes)
+
+    @classmethod
+    def totals(cls, branch, start, end, *fields):
+        return cls.objects.filter(
+            branch=branch, hour__gte=start, hour__lt=end
+        ).aggregate(**{name: Sum(name) for name in fields})
+
+    # 🔹 Xom qatorlardan bucketlarni qaytadan quradi (backfill yoki farqni tuzatish uchun)
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, branch=None):
+        from .sale import Sale, SaleItem
+        from .branchstock import AddProductItem, Expense
+
+        sources = (
+            (Sale.objects, 'branch_id', 'sold_at', {'sales_total': 'total_price', 'discounts_total': 'discount'}),
+            (SaleItem.objects, 'sale__branch_id', 'sold_at', {'items_sold': 'quantity'}),
+            (AddProductItem.objects, 'add_product__branch_id', 'added_at', {'purchase_total': 'total_price'}),
+            (Expense.objects, 'branch_id', 'incurred_at', {'expense_total': 'amount'}),
+        )
+
+        buckets = {}
+        for manager, branch_field, time_field, sums in sources:
+            rows = manager.filter(**{f'{branch_field}__isnull': False})
+            if branch is not None:
+                rows = rows.filter(**{branch_field: branch.pk})
+            rows = (
+                rows.annotate(bucket=TruncHour(time_field, tzinfo=dt_timezone.utc))
+                .values(branch_field, 'bucket')
+                .annotate(**{name: Sum(field) for name, field in sums.items()})
+                .order_by()
+            )
+            for row in rows:
+                bucket = buckets.setdefault((row[branch_field], row['bucket']), {})
+                for name in sums:
+                    bucket[name] = row[name] or 0
+
+        existing = cls.objects.all() if branch is None else cls.objects.filter(branch=branch)
+        existing.delete()
+        cls.objects.bulk_create(
+            [cls(branch_id=branch_id, hour=hour, **values) for (branch_id, hour), values in buckets.items()],
+            batch_size=1000,
+        )
+        return len(buckets)
@@ -1,20 +1,115 @@
-from django.db import models, transaction
+from django.db import models, transaction, IntegrityError
 from decimal import Decimal
 from django.forms import ValidationError
 from .branchstock import Branch, Product, Worker, History, AddProductItem
+from .rollup import HourlyRollup, ceil_hour, floor_hour
+from api.instrumentation import instrumented
 from django.db.models import Sum, F
+from django.utils import timezone
+
+# "+998 (90) 123-45-67", "90 123 45 67" va "998901234567" bitta kalitga keladi
+def normalize_phone(phone):
+    digits = ''.join(ch for ch in str(phone or '') if ch.isdigit())
+    if len(digits) == 9:
+        digits = '998' + digits
+    return digits or None
+
+
+class CustomerManager(models.Manager):
+    # 🔹 Kassa uchun: (filial, normallashgan telefon) bo'yicha mijozni topadi
+    # yoki yaratadi. Qidiruv (branch, phone_key) unique indeksidan bitta so'rov;
+    # jarayon ichida keshlanmaydi: mijoz boshqa jarayonda birlashtirilgan
+    # (merge_customers) yoki o'chirilgan bo'lishi mumkin.
+    def resolve(self, branch, name, phone_number):
+        key = normalize_phone(phone_number)
+        if key is None:
+            customer = self.filter(branch=branch, phone_key__isnull=True, name=name).first()
+            return customer or self.create(branch=branch, name=name, phone_number=phone_number or '')
+
+        customer = self.filter(branch=branch, phone_key=key).first()
+        if customer is None:
+            try:
+                with transaction.atomic():
+                    customer = self.create(branch=branch, name=name, phone_number=phone_number)
+            except IntegrityError:
+                # Parallel kassa shu mijozni bizdan oldin yaratdi
+                customer = self.get(branch=branch, phone_key=key)
+        return customer
+
 
 class Customer(models.Model):
     branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='customers', verbose_name="Filial")
     name = models.CharField(max_length=100, verbose_name="Ismi")
     phone_number = models.CharField(max_length=15, verbose_name="Telefon raqami")
+    phone_key = models.CharField(max_length=20, null=True, blank=True, editable=False, verbose_name="Telefon kaliti")
     debt = models.DecimalField(max_digits=18, decimal_places=2, default=0.00, verbose_name="Qarz miqdori")
     description = models.TextField(blank=True, null=True, verbose_name="Izoh")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Kiritilgan vaqti")
 
+    objects = CustomerManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['branch', 'phone_key'], name='unique_customer_branch_phone'),
+        ]
+        indexes = [
+            models.Index(fields=['-debt'], name='customer_debt_desc_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.debt} so'm"
 
+    def clean(self):
+        key = normalize_phone(self.phone_number)
+        if key and self.branch_id:
+            duplicate = Customer.objects.filter(branch_id=self.branch_id, phone_key=key).exclude(pk=self.pk)
+            if duplicate.exists():
+                raise ValidationError({'phone_number': "Bu filialda shu telefon raqamli mijoz allaqachon bor"})
+
+    def save(self, *args, **kwargs):
+        self.phone_key = normalize_phone(self.phone_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone_number' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_key'}
+        super().save(*args, **kwargs)
+
+
+class DebtEntry(models.Model):
+    OPENING = 'opening'
+    CHARGE = 'charge'
+    PAYMENT = 'payment'
+    REVERSAL = 'reversal'
+    KIND_CHOICES = (
+        (OPENING, "Boshlang‘ich qoldiq"),
+        (CHARGE, "Qarz"),
+        (PAYMENT, "To‘lov"),
+        (REVERSAL, "Bekor qilish"),
+    )
+
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='debt_entries', verbose_name="Qarzdor")
+    sale = models.ForeignKey('Sale', on_delete=models.SET_NULL, related_name='debt_entries', null=True, blank=True, verbose_name="Savdo")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Turi")
+    # Musbat summa qarzni oshiradi, manfiy summa kamaytiradi
+    amount = models.DecimalField(max_digits=18, decimal_places=2, verbose_name="Summa")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Vaqti")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer', 'created_at'], name='debtentry_customer_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.amount}"
+
+    # 🔹 Ledger faqat qo'shiladi; Customer.debt keshlangan balans bo'lib,
+    # F() orqali atomik yangilanadi (parallel savdolarda yo'qolmaydi)
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValueError("Qarz yozuvini o‘zgartirish mumkin emas")
+        super().save(*args, **kwargs)
+        Customer.objects.filter(pk=self.customer_id).update(debt=F('debt') + self.amount)
+
 
 class Sale(models.Model):
     CURRENCY_CHOICES = (
@@ -36,11 +131,20 @@ class Sale(models.Model):
     currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES,default='UZS', verbose_name="Valyuta")
     discount = models.DecimalField(max_digits=18, decimal_places=2, default=0.00, verbose_name="Chegirma")
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='sales', null=True, blank=True, verbose_name="Qarzdor")
-    sold_at = models.DateTimeField(auto_now_add=True, verbose_name="Sotish vaqti")
+    # Oflayn kassa sotuvni keyinroq yuborsa ham haqiqiy vaqti saqlanadi
+    sold_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Sotish vaqti")
+    # Kassa yaratgan identifikator: qayta yuborilgan sotuv ikki marta yozilmaydi
+    client_uuid = models.UUIDField(null=True, blank=True, unique=True, editable=False, verbose_name="Kassa identifikatori")
 
     def __str__(self):
         return f"Sale {self.id}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', 'sold_at'], name='sale_branch_sold_idx'),
+            models.Index(fields=['-sold_at'], name='sale_sold_desc_idx'),
+        ]
+
     # 🔹 Itemlar o‘zgarganda chaqiriladi
     def recalc_total(self):
         total = self.items.aggregate(
@@ -61,94 +165,97 @@ class Sale(models.Model):
         else:
             self.discount = Decimal('0')
 
+    # 🔹 Soatlik yig'indiga faqat farq qo'shiladi
+    def _update_rollup(self, old_sale):
+        total = Decimal(self.total_price or 0)
+        discount = Decimal(self.discount or 0)
+
+        if old_sale is not None and old_sale.branch_id != self.branch_id:
+            HourlyRollup.apply(
+                old_sale.branch_id, old_sale.sold_at,
+                sales_total=-Decimal(old_sale.total_price or 0),
+                discounts_total=-Decimal(old_sale.discount or 0),
+            )
+            old_sale = None
+
+        if old_sale is not None:
+            total -= Decimal(old_sale.total_price or 0)
+            discount -= Decimal(old_sale.discount or 0)
+
+        HourlyRollup.apply(
+            self.branch_id, self.sold_at,
+            sales_total=total, discounts_total=discount,
+        )
+
+    @instrumented('Sale.save')
     @transaction.atomic
     def save(self, *args, **kwargs):
         is_new = self.pk is None
 
         old_amount = Decimal('0')
-        old_customer = None
+        old_customer_id = None
+        old_sale = None
 
         if not is_new:
             old_sale = Sale.objects.select_for_update().get(pk=self.pk)
             old_amount = Decimal(str(old_sale.amount or 0))
-            old_customer = old_sale.customer
-
-        if self.customer:
-            customer_obj, _ = Customer.objects.get_or_create(
-                name=self.customer.name,
-                phone_number=self.customer.phone_number,
-                defaults={
-                    'branch': self.branch,
-                    'debt': Decimal('0')
-                }
+            old_customer_id = old_sale.customer_id
+
+        if self.customer and self.branch is not None:
+            self.customer = Customer.objects.resolve(
+                self.branch, self.customer.name, self.customer.phone_number
             )
-            self.customer = customer_obj
 
         super().save(*args, **kwargs)
 
-        new_amount = Decimal(str(self.amount or 0))
-
-        # 🟢 CASE 1: yangi sale
-        if is_new:
-            if self.customer:
-                self.customer.debt += new_amount
-                self.customer.save(update_fields=['debt'])
-            return
-
-        # 🟢 CASE 2: old_customer YO‘Q → customer QO‘SHILDI
-        if old_customer is None and self.customer is not None:
-            self.customer.debt += new_amount
-            self.customer.save(update_fields=['debt'])
-            return
+        self._update_rollup(old_sale)
 
-        # 🟢 CASE 3: customer olib tashlandi
-        if old_customer and self.customer is None:
-            old_customer.debt -= old_amount
-            if old_customer.debt < 0:
-                old_customer.debt = Decimal('0')
-            old_customer.save(update_fields=['debt'])
-            return
+        new_amount = Decimal(str(self.amount or 0))
 
-        # 🟢 CASE 4: customer o‘zgarmagan
-        if old_customer == self.customer:
+        # 🟢 Qarz faqat ledger yozuvlari orqali o'zgaradi (DebtEntry.save)
+        if self.customer_id == old_customer_id:
             diff = new_amount - old_amount
-            if diff != 0:
-                self.customer.debt += diff
-                if self.customer.debt < 0:
-                    self.customer.debt = Decimal('0')
-                self.customer.save(update_fields=['debt'])
+            if self.customer_id and diff:
+                DebtEntry.objects.create(
+                    customer_id=self.customer_id, sale=self, amount=diff,
+                    kind=DebtEntry.CHARGE if diff > 0 else DebtEntry.REVERSAL,
+                )
             return
 
-        # 🟢 CASE 5: customer ALMASHDI
-        if old_customer and self.customer and old_customer != self.customer:
-            old_customer.debt -= old_amount
-            if old_customer.debt < 0:
-                old_customer.debt = Decimal('0')
-            old_customer.save(update_fields=['debt'])
-
-            self.customer.debt += new_amount
-            self.customer.save(update_fields=['debt'])
-
+        # 🟢 customer olib tashlandi yoki almashdi: eskisidan qaytariladi
+        if old_customer_id:
+            DebtEntry.objects.create(
+                customer_id=old_customer_id, sale=self, amount=-old_amount,
+                kind=DebtEntry.REVERSAL,
+            )
 
+        if self.customer_id:
+            DebtEntry.objects.create(
+                customer_id=self.customer_id, sale=self, amount=new_amount,
+                kind=DebtEntry.CHARGE,
+            )
 
     @transaction.atomic
     def delete(self, *args, **kwargs):
-        if self.customer:
-            self.customer.debt -= self.amount or Decimal('0')
-            if self.customer.debt < 0:
-                self.customer.debt = Decimal('0')
-            self.customer.save(update_fields=['debt'])
+        # Qarzni qaytarish post_delete signalida (queryset.delete() uchun ham)
+        with History.objects.batch():
+            return super().delete(*args, **kwargs)
 
-        super().delete(*args, **kwargs)
 
-    
-            
 class SaleItem(models.Model):
     sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE, verbose_name="Mahsulot")
     quantity = models.DecimalField(max_digits=12, decimal_places=3, verbose_name="Miqdor")
     total_price = models.DecimalField(max_digits=18, decimal_places=2, default=0.00)
-    sold_at = models.DateTimeField(auto_now_add=True, verbose_name="Sotish vaqti")
+    # Sotuv paytidagi o'rtacha tannarx: foyda hisobotlari shu saqlangan qiymatdan
+    unit_cost = models.DecimalField(max_digits=14, decimal_places=4, default=Decimal('0'), editable=False, verbose_name="Tannarx (dona)")
+    total_cost = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0'), editable=False, verbose_name="Tannarx")
+    sold_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Sotish vaqti")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sold_at'], name='saleitem_sold_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.quantity}"
@@ -159,6 +266,7 @@ class SaleItem(models.Model):
                 raise ValidationError("Omborda yetarli mahsulot yo‘q")
 
 
+    @instrumented('SaleItem.save')
     @transaction.atomic
     def save(self, *args, **kwargs):
         is_new = self.pk is None
@@ -167,12 +275,18 @@ class SaleItem(models.Model):
         if not is_new:
             old_quantity = SaleItem.objects.get(pk=self.pk).quantity
 
+        from api.services import stock
+
         self.total_price = Decimal(self.product.sale_price) * Decimal(self.quantity)
+        if is_new:
+            self.unit_cost = self.product.average_cost
+        self.total_cost = Decimal(self.unit_cost) * Decimal(self.quantity)
 
-        delta = self.quantity if is_new else (self.quantity - old_quantity)
+        delta = Decimal(self.quantity) - old_quantity
 
-        if delta > 0 and self.product.quantity < delta:
-            raise ValidationError("Omborda yetarli mahsulot yo‘q")
+        # Tekshiruv va kamaytirish bitta shartli UPDATE'da: ikki kassa bir
+        # vaqtda oxirgi mahsulotni sota olmaydi
+        stock.take({self.product_id: delta})
 
         super().save(*args, **kwargs)
 
@@ -181,10 +295,9 @@ class SaleItem(models.Model):
         if delta == 0:
             return
 
-        self.product.quantity = F('quantity') - delta
-        self.product.save(update_fields=['quantity'])
+        HourlyRollup.apply(self.sale.branch_id, self.sold_at, items_sold=delta)
 
-        History.objects.create(
+        History.objects.record(
             branch=self.sale.branch,
             worker=self.sale.worker,
             product=self.product,
@@ -194,7 +307,7 @@ class SaleItem(models.Model):
         
 
 from django.db import models
-from django.db.models import Sum
+from django.db.models import Sum, Q
 
 class DailyReport(models.Model):
     branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='daily_reports', verbose_name="Filial")
@@ -206,33 +319,60 @@ class DailyReport(models.Model):
     total_purchase = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Jami sotib olishlar")
     total_debt = models.DecimalField(max_digits=18, decimal_places=2, default=0, verbose_name="Jami qarzlar")   
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqti")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['branch', '-created_at'], name='dailyreport_branch_created_idx'),
+            models.Index(fields=['-created_at'], name='dailyreport_created_desc_idx'),
+        ]
     
     
     def __str__(self):
         return f"{self.branch.name}: {self.start_datetime} - {self.end_datetime}"
     
+    @instrumented('DailyReport.save')
     def save(self, *args, **kwargs):
         if self.branch and self.start_datetime and self.end_datetime:
+            start, end = self.start_datetime, self.end_datetime
+
+            # To'liq soatlar HourlyRollup'dan, chetdagi bo'lak soatlar esa
+            # xom qatorlardan olinadi
+            first_hour = ceil_hour(start)
+            last_hour = floor_hour(end)
+
+            if first_hour < last_hour:
+                totals = HourlyRollup.totals(
+                    self.branch, first_hour, last_hour,
+                    'sales_total', 'discounts_total', 'purchase_total'
+                )
+                sale_window = (
+                    Q(sold_at__gte=start, sold_at__lt=first_hour) |
+                    Q(sold_at__gte=last_hour, sold_at__lte=end)
+                )
+                purchase_window = (
+                    Q(added_at__gte=start, added_at__lt=first_hour) |
+                    Q(added_at__gte=last_hour, added_at__lte=end)
+                )
+            else:
+                totals = {}
+                sale_window = Q(sold_at__gte=start, sold_at__lte=end)
+                purchase_window = Q(added_at__gte=start, added_at__lte=end)
+
             # Sales
-            sales_qs = Sale.objects.filter(
-                branch=self.branch,
-                sold_at__gte=self.start_datetime,
-                sold_at__lte=self.end_datetime
+            sales = Sale.objects.filter(sale_window, branch=self.branch).aggregate(
+                total=Sum('total_price'), discount=Sum('discount')
             )
-            self.total_sales = sales_qs.aggregate(total=Sum('total_price'))['total'] or 0
-            self.total_discounts = sales_qs.aggregate(total=Sum('discount'))['total'] or 0
+            self.total_sales = (totals.get('sales_total') or 0) + (sales['total'] or 0)
+            self.total_discounts = (totals.get('discounts_total') or 0) + (sales['discount'] or 0)
 
             # Purchases
-            purchase_qs = AddProductItem.objects.filter(
-                add_product__branch=self.branch,
-                added_at__gte=self.start_datetime,
-                added_at__lte=self.end_datetime
-            )
-            self.total_purchase = purchase_qs.aggregate(total=Sum('total_price'))['total'] or 0
+            purchase = AddProductItem.objects.filter(
+                purchase_window, add_product__branch=self.branch
+            ).aggregate(total=Sum('total_price'))
+            self.total_purchase = (totals.get('purchase_total') or 0) + (purchase['total'] or 0)
 
             # Debts
             debt_qs = Customer.objects.filter(branch=self.branch)
             self.total_debt = debt_qs.aggregate(total=Sum('debt'))['total'] or 0
 
         super().save(*args, **kwargs)
-
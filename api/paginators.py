@@ -0,0 +1,105 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+# 🔹 Katta jadvallar (History, Sale, Expense) uchun admin paginatori:
+#  - COUNT(*) natijasi keshlanadi, PostgreSQL'da filtrsiz ro'yxat uchun esa
+#    pg_class.reltuples taxminidan foydalaniladi;
+#  - har bir sahifaning oxirgi kaliti keshlanadi va keyingi sahifa OFFSET
+#    o'rniga "kalitdan keyingilar" (keyset) so'rovi bilan olinadi.
+# Kalit topilmasa (masalan, to'g'ridan-to'g'ri 500-sahifaga o'tilsa) oddiy
+# OFFSET ishlatiladi.
+class KeysetPaginator(Paginator):
+    cache_timeout = 60
+    estimate_threshold = 100_000
+
+    @cached_property
+    def _cache_key(self):
+        query = self.object_list.query
+        try:
+            sql = str(query)
+        except Exception:
+            sql = repr(query)
+        digest = hashlib.md5(f'{query.model._meta.label}:{sql}:{self.per_page}'.encode()).hexdigest()
+        return f'keyset-paginator:{digest}'
+
+    @cached_property
+    def count(self):
+        key = f'{self._cache_key}:count'
+        count = cache.get(key)
+        if count is None:
+            count = self._estimate()
+            if count is None:
+                count = self.object_list.count()
+            cache.set(key, count, self.cache_timeout)
+        return count
+
+    def _estimate(self):
+        query = self.object_list.query
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql' or query.where:
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [query.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] < self.estimate_threshold:
+            return None
+        return row[0]
+
+    @cached_property
+    def _ordering(self):
+        ordering = []
+        opts = self.object_list.model._meta
+        for term in self.object_list.query.order_by:
+            if not isinstance(term, str):
+                return None
+            descending = term.startswith('-')
+            name = term.lstrip('-')
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+            if field.is_relation or not field.concrete:
+                return None
+            ordering.append((field.name, field.attname, descending))
+
+        # Kalit yagona bo'lishi uchun oxirida pk bo'lishi shart
+        if not ordering or ordering[-1][0] != opts.pk.name:
+            return None
+        return ordering
+
+    def _after(self, boundary):
+        condition = Q()
+        equal = {}
+        for (name, _, descending), value in zip(self._ordering, boundary):
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+
+        boundary = None
+        if self._ordering and number > 1:
+            boundary = cache.get(f'{self._cache_key}:page:{number}')
+
+        if boundary is not None:
+            items = list(self.object_list.filter(self._after(boundary))[:self.per_page])
+        else:
+            items = list(self.object_list[bottom:bottom + self.per_page])
+
+        if self._ordering and items:
+            last = items[-1]
+            values = [getattr(last, attname) for _, attname, _ in self._ordering]
+            if None not in values:
+                cache.set(f'{self._cache_key}:page:{number + 1}', values, self.cache_timeout)
+
+        return self._get_page(items, number, self)
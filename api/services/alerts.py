@@ -0,0 +1,34 @@
+from django.db.models import F
+from django.utils import timezone
+
+from api.models import Product, StockAlert
+
+
+# 🔹 Faqat shu o'zgarishda chegarani kesib o'tgan mahsulotlar baholanadi:
+# kamayganlar ichidan endi quantity <= reorder_level bo'lib, avval undan
+# yuqori bo'lganlarga alert ochiladi; oshganlarning ochiq alertlari yopiladi.
+def evaluate(deltas):
+    fallen = [pk for pk, delta in deltas.items() if delta < 0]
+    risen = [pk for pk, delta in deltas.items() if delta > 0]
+
+    if fallen:
+        rows = Product.objects.filter(pk__in=fallen, quantity__lte=F('reorder_level')).values_list(
+            'pk', 'branch_id', 'quantity', 'reorder_level'
+        )
+        StockAlert.objects.bulk_create([
+            StockAlert(product_id=pk, branch_id=branch_id, quantity=quantity, reorder_level=reorder_level)
+            for pk, branch_id, quantity, reorder_level in rows
+            if quantity - deltas[pk] > reorder_level
+        ])
+
+    if risen:
+        StockAlert.objects.filter(
+            product_id__in=risen,
+            resolved_at__isnull=True,
+            product__quantity__gt=F('product__reorder_level'),
+        ).update(resolved_at=timezone.now())
+
+
+def low_stock(branch):
+    # Shart indeks shartiga aynan mos: partial indeks ishlatiladi
+    return Product.objects.filter(branch=branch, quantity__lte=F('reorder_level'))
@@ -0,0 +1,70 @@
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from api.models import Product
+from .cache import TTLCache
+
+_cache = TTLCache(
+    maxsize=getattr(settings, 'BARCODE_CACHE_SIZE', 4096),
+    ttl=getattr(settings, 'BARCODE_CACHE_TTL', 300),
+)
+# product.pk -> (branch_id, barcode): shtrixkod o'zgarsa ham eski kalitni topish uchun
+_keys = {}
+_keys_lock = threading.Lock()
+
+
+def _serialize(product):
+    return {
+        'id': product.pk,
+        'branch': product.branch_id,
+        'name': product.name,
+        'barcode': product.barcode,
+        'sale_price': product.sale_price,
+        'quantity': product.quantity,
+        'base_unit': product.base_unit,
+    }
+
+
+def lookup(branch_id, barcode):
+    key = (int(branch_id), barcode)
+    data = _cache.get(key)
+    if data is not None:
+        return data
+
+    product = (
+        Product.objects.filter(branch_id=branch_id, barcode=barcode)
+        .only('id', 'branch_id', 'name', 'barcode', 'sale_price', 'quantity', 'base_unit')
+        .first()
+    )
+    if product is None:
+        return None
+
+    data = _serialize(product)
+    with _keys_lock:
+        _keys[product.pk] = key
+    _cache.set(key, data)
+    return data
+
+
+def _evict(product_ids):
+    with _keys_lock:
+        keys = [_keys.pop(pk, None) for pk in product_ids]
+    for key in keys:
+        if key is not None:
+            _cache.pop(key)
+
+
+# 🔹 Narx yoki qoldiq o'zgarganda chaqiriladi. Commitdan keyin yana bir bor
+# tozalanadi, aks holda parallel so'rov eski qiymatni qayta keshlab qo'yishi mumkin.
+def invalidate(product_ids):
+    product_ids = list(product_ids)
+    _evict(product_ids)
+    transaction.on_commit(lambda: _evict(product_ids))
+
+
+def clear():
+    with _keys_lock:
+        _keys.clear()
+    _cache.clear()
@@ -0,0 +1,116 @@
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from api.instrumentation import instrumented
+from api.models import Customer, History, HourlyRollup, Sale, SaleItem
+from . import stock
+
+
+def _merge_items(items):
+    # Bir xil mahsulot savatda bir necha marta kelsa, miqdorlari qo'shiladi
+    if not isinstance(items, list):
+        raise ValidationError("Savatdagi mahsulot noto‘g‘ri ko‘rsatilgan")
+
+    quantities = {}
+    for item in items:
+        try:
+            product_id = int(item['product'])
+            quantity = Decimal(str(item['quantity']))
+        except (KeyError, TypeError, ValueError, OverflowError, InvalidOperation):
+            raise ValidationError("Savatdagi mahsulot noto‘g‘ri ko‘rsatilgan")
+
+        # NaN/Infinity bilan solishtirish InvalidOperation beradi
+        if not quantity.is_finite() or quantity <= 0:
+            raise ValidationError("Miqdor musbat bo‘lishi kerak")
+
+        quantities[product_id] = quantities.get(product_id, Decimal('0')) + quantity
+    return quantities
+
+
+# 🔹 Butun savat bitta tranzaksiyada yoziladi. So'rovlar soni savatdagi
+# mahsulotlar soniga bog'liq emas: mahsulotlar bir marta qulflanadi, qoldiq
+# bitta shartli UPDATE bilan, SaleItem va History esa bulk_create bilan yoziladi.
+@instrumented('checkout')
+@transaction.atomic
+def checkout(*, branch, worker, items, amount, currency='UZS', customer=None,
+             sold_at=None, client_uuid=None, check_stock=True):
+    quantities = _merge_items(items)
+    if not quantities:
+        raise ValidationError("Savat bo‘sh")
+
+    products = stock.lock(quantities, branch=branch)
+
+    missing = set(quantities) - {p.pk for p in products}
+    if missing:
+        raise ValidationError(
+            f"Mahsulot topilmadi: {', '.join(str(pk) for pk in sorted(missing))}"
+        )
+
+    if check_stock:
+        stock.take(quantities, products)
+    else:
+        # Oflayn sotuv kassada allaqachon bo'lib o'tgan: qoldiq manfiy bo'lsa ham yoziladi
+        stock.adjust({pk: -q for pk, q in quantities.items()}, products=products)
+
+    sale_items = [
+        SaleItem(
+            product=p,
+            quantity=quantities[p.pk],
+            total_price=Decimal(p.sale_price) * quantities[p.pk],
+            unit_cost=p.average_cost,
+            total_cost=p.average_cost * quantities[p.pk],
+        )
+        for p in products
+    ]
+
+    try:
+        amount = Decimal(str(amount))
+    except InvalidOperation:
+        raise ValidationError("To‘langan summa noto‘g‘ri")
+    if not amount.is_finite():
+        raise ValidationError("To‘langan summa noto‘g‘ri")
+
+    if not isinstance(currency, str) or currency not in dict(Sale.CURRENCY_CHOICES):
+        raise ValidationError("Valyuta noto‘g‘ri")
+
+    if customer and not isinstance(customer, dict):
+        raise ValidationError("Mijoz ma’lumotlari noto‘g‘ri")
+    if customer:
+        customer = Customer(
+            name=customer.get('name', ''),
+            phone_number=customer.get('phone_number', ''),
+        )
+
+    sale = Sale(
+        branch=branch,
+        worker=worker,
+        amount=amount,
+        currency=currency,
+        customer=customer or None,
+        client_uuid=client_uuid,
+    )
+    if sold_at is not None:
+        sale.sold_at = sold_at
+    sale.total_price = sum((i.total_price for i in sale_items), Decimal('0'))
+    sale._recalc_discount()
+    sale.save()
+
+    for item in sale_items:
+        item.sale = sale
+        item.sold_at = sale.sold_at
+    SaleItem.objects.bulk_create(sale_items)
+    HourlyRollup.apply(branch.pk, sale.sold_at, items_sold=sum(quantities.values()))
+
+    with History.objects.batch():
+        for p in products:
+            History.objects.record(
+                branch=branch,
+                worker=worker,
+                product=p,
+                change_type="Sotildi",
+                quantity_changed=quantities[p.pk],
+            )
+
+    return sale
@@ -0,0 +1,103 @@
+import heapq
+from decimal import Decimal
+
+from django.db import transaction
+
+from api.models import AddProductItem, Product, SaleItem
+
+PRECISION = Decimal('0.0001')
+BATCH_SIZE = 1000
+
+
+# 🔹 O'rtacha tannarx (moving average). Kirim qiymati (dv) va miqdori (dq)
+# qo'shiladi; sotuv o'rtachani o'zgartirmaydi. Manfiy qoldiq 0 deb olinadi.
+def moving_average(quantity, average, dq, dv):
+    on_hand = max(Decimal(quantity), Decimal('0'))
+    total = on_hand + dq
+    if total <= 0:
+        return average
+    value = on_hand * Decimal(average) + dv
+    return max(value / total, Decimal('0')).quantize(PRECISION)
+
+
+# {product_id: (miqdor farqi, qiymat farqi)} — qoldiq o'zgarishidan OLDIN chaqiriladi
+@transaction.atomic
+def receive(changes):
+    from . import stock
+
+    changes = {pk: change for pk, change in changes.items() if any(change)}
+    if not changes:
+        return
+
+    products = stock.lock(changes)
+    for product in products:
+        product.average_cost = moving_average(product.quantity, product.average_cost, *changes[product.pk])
+    Product.objects.bulk_update(products, ['average_cost'])
+
+
+def _events(branch=None):
+    receipts = AddProductItem.objects.order_by('product_id', 'added_at', 'pk')
+    sales = SaleItem.objects.order_by('product_id', 'sold_at', 'pk')
+    if branch is not None:
+        receipts = receipts.filter(product__branch=branch)
+        sales = sales.filter(product__branch=branch)
+
+    # Bir vaqtdagi kirim sotuvdan oldin hisoblanadi (0 < 1)
+    return heapq.merge(
+        ((pk, at, 0, quantity, total) for pk, at, quantity, total in receipts.values_list(
+            'product_id', 'added_at', 'added_quantity', 'total_price').iterator(chunk_size=BATCH_SIZE)),
+        ((pk, at, 1, quantity, (item, unit_cost)) for pk, at, quantity, item, unit_cost in sales.values_list(
+            'product_id', 'sold_at', 'quantity', 'pk', 'unit_cost').iterator(chunk_size=BATCH_SIZE)),
+        key=lambda event: event[:3],
+    )
+
+
+# 🔹 Tarixiy ma'lumotlar uchun: barcha kirim va sotuvlar vaqt bo'yicha bir marta
+# (mahsulot tartibida, oqim bilan) o'qilib, o'rtacha tannarx qayta hisoblanadi.
+# sale_items=True bo'lsa har bir sotuvning o'sha paytdagi tannarxi ham yoziladi.
+# Kirim va sotuvlar joriy qoldiqni to'liq tushuntirmasa (birinchi kirimgacha
+# qoldiq bo'lgan yoki qoldiq qo'lda o'zgartirilgan), o'sha qoldiqning tannarxi
+# noma'lum: mahsulot o'zgartirilmaydi va `skipped` ro'yxatida qaytariladi.
+@transaction.atomic
+def recompute(branch=None, sale_items=False):
+    products = Product.objects.all() if branch is None else Product.objects.filter(branch=branch)
+    on_hand = dict(products.values_list('pk', 'quantity').iterator(chunk_size=BATCH_SIZE))
+
+    averages = {}
+    item_costs = []
+    skipped = []
+
+    def finish(pk, quantity, average, costs):
+        if pk is None or average is None:
+            return
+        if quantity != on_hand.get(pk):
+            skipped.append(pk)
+            return
+        averages[pk] = average
+        item_costs.extend(costs)
+
+    quantity, average, current, costs = Decimal('0'), None, None, []
+    for pk, _, kind, amount, extra in _events(branch):
+        if pk != current:
+            finish(current, quantity, average, costs)
+            quantity, average, current, costs = Decimal('0'), None, pk, []
+
+        if kind == 0:
+            average = moving_average(quantity, average or Decimal('0'), amount, extra)
+            quantity += amount
+        else:
+            quantity -= amount
+            item, unit_cost = extra
+            # Birinchi kirimgacha bo'lgan sotuvlar tannarxi noma'lum, o'zgartirilmaydi
+            if sale_items and average is not None and unit_cost != average:
+                costs.append(SaleItem(pk=item, unit_cost=average, total_cost=average * amount))
+    finish(current, quantity, average, costs)
+
+    changed = [
+        Product(pk=pk, average_cost=averages[pk])
+        for pk, old in products.values_list('pk', 'average_cost').iterator(chunk_size=BATCH_SIZE)
+        if pk in averages and old != averages[pk]
+    ]
+    Product.objects.bulk_update(changed, ['average_cost'], batch_size=BATCH_SIZE)
+    SaleItem.objects.bulk_update(item_costs, ['unit_cost', 'total_cost'], batch_size=BATCH_SIZE)
+    return len(averages), len(changed), len(item_costs), skipped
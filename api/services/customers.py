@@ -0,0 +1,64 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from api.models import Customer, DebtEntry, Sale
+from api.models.sale import normalize_phone
+
+BATCH_SIZE = 500
+
+
+def _batches(items):
+    items = list(items)
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+def _repoint(queryset, field, mapping):
+    for batch in _batches(mapping.items()):
+        queryset.filter(**{f'{field}__in': [old for old, _ in batch]}).update(**{field: Case(
+            *[When(**{field: old}, then=Value(new)) for old, new in batch],
+        )})
+
+
+# 🔹 Bir filialda normallashgan telefoni bir xil bo'lgan mijozlarni eng eski
+# (eng kichik pk) yozuvga birlashtiradi: savdolar va qarz yozuvlari ko'chiriladi,
+# qarzlar qo'shiladi, dublikatlar o'chiriladi. Hammasi bulk so'rovlar bilan.
+@transaction.atomic
+def merge_duplicates(dry_run=False):
+    survivors = {}
+    merged = {}
+    extra_debt = defaultdict(Decimal)
+    stale_keys = []
+
+    rows = Customer.objects.order_by('pk').values_list('pk', 'branch_id', 'phone_number', 'phone_key', 'debt')
+    for pk, branch_id, phone_number, phone_key, debt in rows.iterator(chunk_size=2000):
+        key = normalize_phone(phone_number)
+        if key is None:
+            continue
+
+        survivor = survivors.setdefault((branch_id, key), pk)
+        if survivor != pk:
+            merged[pk] = survivor
+            extra_debt[survivor] += debt
+        elif phone_key != key:
+            stale_keys.append(Customer(pk=pk, phone_key=key))
+
+    if dry_run or not (merged or stale_keys):
+        return merged
+
+    _repoint(Sale.objects, 'customer_id', merged)
+    _repoint(DebtEntry.objects, 'customer_id', merged)
+
+    for batch in _batches(extra_debt.items()):
+        Customer.objects.filter(pk__in=[pk for pk, _ in batch]).update(debt=F('debt') + Case(
+            *[When(pk=pk, then=Value(amount)) for pk, amount in batch],
+        ))
+
+    for batch in _batches(merged):
+        Customer.objects.filter(pk__in=batch).delete()
+
+    Customer.objects.bulk_update(stale_keys, ['phone_key'], batch_size=BATCH_SIZE)
+    return merged
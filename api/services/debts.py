@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from api.models import Customer, DebtEntry
+
+
+# 🔹 Customer.debt (kesh) ni ledger yig'indisi bilan solishtiradi.
+# Qaytaradi: (tekshirilgan mijozlar soni, [(customer, ledger bo'yicha qarz), ...])
+@transaction.atomic
+def reconcile(branch_id=None, fix=False):
+    customers = Customer.objects.all()
+    entries = DebtEntry.objects.all()
+    if branch_id:
+        customers = customers.filter(branch_id=branch_id)
+        entries = entries.filter(customer__branch_id=branch_id)
+
+    if fix:
+        # Avval mijozlar qulflanadi, keyin ledger o'qiladi: oraliqda yozilgan
+        # DebtEntry Customer.debt ni yangilashi uchun shu qulfni kutadi
+        list(customers.select_for_update().order_by('pk').values_list('pk', flat=True))
+
+    ledger = dict(
+        entries.values('customer').annotate(total=Sum('amount')).order_by().values_list('customer', 'total')
+    )
+
+    drifted = []
+    checked = 0
+    for customer in customers.only('pk', 'name', 'debt').iterator(chunk_size=2000):
+        checked += 1
+        expected = ledger.get(customer.pk) or Decimal('0')
+        if customer.debt != expected:
+            drifted.append((customer, expected))
+
+    if drifted and fix:
+        fixed = []
+        for customer, expected in drifted:
+            fixed.append(Customer(pk=customer.pk, debt=expected))
+        Customer.objects.bulk_update(fixed, ['debt'], batch_size=1000)
+
+    return checked, drifted
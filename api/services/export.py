@@ -0,0 +1,121 @@
+import csv
+import tempfile
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from openpyxl import Workbook
+
+from api.models import DailyReport, Expense, History, SaleItem
+from .profit import profit_rows
+
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    # csv.writer yozgan qatorni qaytaradi, hech narsani xotirada ushlamaydi
+    def write(self, value):
+        return value
+
+
+def _localtime(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+def _sales(branch, start, end):
+    queryset = SaleItem.objects.filter(sale__branch=branch, sold_at__gte=start, sold_at__lte=end)
+    return (
+        ['Savdo', 'Vaqt', 'Hodim', 'Mahsulot', 'Shtrixkod', 'Miqdor', 'Summa', 'Valyuta', 'Chegirma (savdo)'],
+        queryset.order_by('sold_at', 'pk').values_list(
+            'sale_id', 'sold_at', 'sale__worker__name', 'product__name', 'product__barcode',
+            'quantity', 'total_price', 'sale__currency', 'sale__discount',
+        ),
+        (1,),
+    )
+
+
+def _history(branch, start, end):
+    queryset = History.objects.filter(branch=branch, changed_at__gte=start, changed_at__lte=end)
+    return (
+        ['Vaqt', 'Hodim', 'Mahsulot', "O'zgarish turi", 'Miqdor'],
+        queryset.order_by('changed_at', 'pk').values_list(
+            'changed_at', 'worker__name', 'product__name', 'change_type', 'quantity_changed',
+        ),
+        (0,),
+    )
+
+
+def _expenses(branch, start, end):
+    queryset = Expense.objects.filter(branch=branch, incurred_at__gte=start, incurred_at__lte=end)
+    return (
+        ['Vaqt', 'Hodim', 'Sababi', 'Summa', 'Izoh'],
+        queryset.order_by('incurred_at', 'pk').values_list(
+            'incurred_at', 'worker__name', 'category', 'amount', 'description',
+        ),
+        (0,),
+    )
+
+
+def _daily_reports(branch, start, end):
+    queryset = DailyReport.objects.filter(branch=branch, start_datetime__gte=start, end_datetime__lte=end)
+    return (
+        ['Qachondan', 'Qachongacha', 'Jami kassa', 'Jami chegirmalar', 'Jami sotib olishlar', 'Jami qarzlar'],
+        queryset.order_by('start_datetime', 'pk').values_list(
+            'start_datetime', 'end_datetime', 'total_sales', 'total_discounts', 'total_purchase', 'total_debt',
+        ),
+        (0, 1),
+    )
+
+
+def _profit(branch, start, end):
+    return (
+        ['Kun', 'Mahsulot', 'Miqdor', 'Tushum', 'Tannarx', 'Foyda'],
+        profit_rows(start, end, branch).values_list(
+            'day', 'product__name', 'quantity', 'revenue', 'cost', 'profit',
+        ),
+        (),
+    )
+
+
+EXPORTS = {
+    'sales': _sales,
+    'history': _history,
+    'expenses': _expenses,
+    'daily-reports': _daily_reports,
+    'profit': _profit,
+}
+
+
+def rows(kind, branch, start, end):
+    if kind not in EXPORTS:
+        raise ValidationError("Noma'lum eksport turi")
+
+    header, queryset, time_columns = EXPORTS[kind](branch, start, end)
+    yield header
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        row = list(row)
+        for index in time_columns:
+            row[index] = _localtime(row[index])
+        yield row
+
+
+# 🔹 StreamingHttpResponse uchun: har bir qator alohida satr sifatida
+# yuboriladi, xotirada butun natija hech qachon yig'ilmaydi
+def stream_csv(kind, branch, start, end):
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # Excel UTF-8 ni to'g'ri ochishi uchun BOM
+    for row in rows(kind, branch, start, end):
+        yield writer.writerow(row)
+
+
+# XLSX zip formatida bo'lgani uchun oqim qilib bo'lmaydi: openpyxl write_only
+# rejimida vaqtinchalik faylga yoziladi (xotira baribir o'zgarmas)
+def write_xlsx(kind, branch, start, end):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(kind)
+    for row in rows(kind, branch, start, end):
+        sheet.append(row)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,50 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.models import IdempotencyKey
+
+TTL = getattr(settings, 'IDEMPOTENCY_TTL', 24 * 3600)
+MAX_KEY_LENGTH = 255
+
+
+def fingerprint(request):
+    digest = hashlib.sha256(f"{request.method} {request.path}\n".encode())
+    if request.content_type.startswith('multipart/'):
+        # Fayl yuklashda request.body o'qilmaydi: maydonlar va fayllar alohida xeshlanadi
+        for name, values in sorted(request.POST.lists()):
+            digest.update(f"{name}={values}\n".encode())
+        for name, upload in sorted(request.FILES.items()):
+            digest.update(f"{name}:{upload.name}\n".encode())
+            for chunk in upload.chunks():
+                digest.update(chunk)
+            upload.seek(0)
+    else:
+        digest.update(request.body)
+    return digest.hexdigest()
+
+
+# Muddati o'tgan kalit topilsa, o'chiriladi: so'rov yangidek bajariladi
+def lookup(scope, key):
+    entry = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+    if entry is not None and entry.expires_at <= timezone.now():
+        entry.delete()
+        return None
+    return entry
+
+
+def store(scope, key, fingerprint, status_code, response):
+    return IdempotencyKey.objects.create(
+        scope=scope,
+        key=key,
+        fingerprint=fingerprint,
+        status_code=status_code,
+        response=response,
+        expires_at=timezone.now() + timedelta(seconds=TTL),
+    )
+
+
+def purge():
+    return IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()[0]
@@ -0,0 +1,126 @@
+import hashlib
+import inspect
+import json
+import logging
+import traceback
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.utils import timezone
+
+from api.models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS = {}
+
+# Bir xil vazifa shu vaqt ichida qayta so'ralsa, tayyor natija qaytariladi
+RESULT_TTL = getattr(settings, 'JOB_RESULT_TTL', 600)
+# Shuncha vaqtdan beri "bajarilmoqda" turgan vazifa ishchisi o'lgan deb hisoblanadi
+TIMEOUT = getattr(settings, 'JOB_TIMEOUT', 3600)
+MAX_ATTEMPTS = getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+RESULTS_DIR = Path(getattr(settings, 'JOB_RESULTS_DIR', settings.BASE_DIR / 'job_results'))
+
+
+def job(name):
+    def decorator(func):
+        JOBS[name] = func
+        return func
+    return decorator
+
+
+def _normalize(params):
+    # JSONField'da qanday saqlansa, kalit ham shunday hisoblanadi
+    return json.loads(json.dumps(params, cls=DjangoJSONEncoder))
+
+
+# Noto'g'ri parametr ishchida emas, navbatga qo'yishda aniqlanadi
+def _check_params(name, params):
+    try:
+        inspect.signature(JOBS[name]).bind(None, **params)
+    except TypeError:
+        expected = list(inspect.signature(JOBS[name]).parameters)[1:]
+        raise ValidationError(f"{name} vazifasi parametrlari noto‘g‘ri, kutilgan: {', '.join(expected)}")
+
+
+def make_key(name, params):
+    payload = json.dumps([name, params], sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# 🔹 Navbatga qo'yadi. Shu vazifa navbatda/bajarilmoqda bo'lsa yoki yaqinda
+# tayyor bo'lgan bo'lsa, yangisi yaratilmaydi — o'sha Job qaytariladi.
+# force=True tayyor natijani e'tiborsiz qoldiradi (qayta hisoblash uchun).
+def enqueue(name, params=None, force=False):
+    if name not in JOBS:
+        raise ValidationError(f"Noma'lum vazifa: {name}")
+
+    params = _normalize(params or {})
+    _check_params(name, params)
+    key = make_key(name, params)
+    fresh = Q(status__in=[Job.PENDING, Job.RUNNING])
+    if not force:
+        fresh |= Q(status=Job.DONE, finished_at__gte=timezone.now() - timedelta(seconds=RESULT_TTL))
+    existing = Job.objects.filter(fresh, key=key).order_by('-created_at').first()
+    return existing or Job.objects.create(name=name, params=params, key=key)
+
+
+def requeue_stale():
+    deadline = timezone.now() - timedelta(seconds=TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING, started_at__lt=deadline)
+    stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=Job.FAILED, error="Vaqt tugadi", finished_at=timezone.now()
+    )
+    stale.filter(attempts__lt=MAX_ATTEMPTS).update(status=Job.PENDING)
+
+
+# 🔹 Navbatdagi eng eski vazifani oladi. Shartli UPDATE (status=pending
+# bo'lsa) tufayli ikki ishchi bitta vazifani ololmaydi.
+def claim(worker):
+    pending = Job.objects.filter(status=Job.PENDING).order_by('created_at', 'pk')
+    for pk in pending.values_list('pk', flat=True)[:10]:
+        claimed = Job.objects.filter(pk=pk, status=Job.PENDING).update(
+            status=Job.RUNNING, worker=worker, started_at=timezone.now(),
+            attempts=F('attempts') + 1, progress=0, message='', error='',
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run(job):
+    func = JOBS.get(job.name)
+    try:
+        if func is None:
+            raise ValidationError(f"Noma'lum vazifa: {job.name}")
+        result = func(job, **job.params)
+    except Exception:
+        logger.exception("Job %s #%s xato bilan tugadi", job.name, job.pk)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED, error=traceback.format_exc(), finished_at=timezone.now(),
+        )
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.DONE, result=result, progress=100, finished_at=timezone.now(),
+    )
+    return True
+
+
+def result_path(job, suffix):
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    return RESULTS_DIR / f"job-{job.pk}{suffix}"
+
+
+def prune(days):
+    old = Job.objects.filter(
+        status__in=[Job.DONE, Job.FAILED], finished_at__lt=timezone.now() - timedelta(days=days)
+    )
+    for result in old.filter(result__isnull=False).values_list('result', flat=True):
+        if isinstance(result, dict) and result.get('file'):
+            (RESULTS_DIR / result['file']).unlink(missing_ok=True)
+    return old.delete()[0]
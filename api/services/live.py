@@ -0,0 +1,109 @@
+import threading
+import time
+from datetime import datetime, time as dt_time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+FIELDS = ('sales_total', 'discounts_total', 'items_sold', 'purchase_total', 'expense_total')
+
+# Boshqa jarayonlardagi (masalan WSGI kassa) yozuvlarni ham ko'rish uchun
+# bugungi yig'indilar shuncha soniyada bir rollupdan qayta o'qiladi
+RESYNC_INTERVAL = getattr(settings, 'LIVE_RESYNC_INTERVAL', 60)
+
+_lock = threading.Lock()
+_resync_lock = threading.Lock()
+_totals = {}
+_day = None
+_synced_at = 0.0
+_subscribers = set()
+
+
+# 🔹 Jarayon ichidagi bugungi yig'indilar. HourlyRollup.apply har bir deltani
+# commitdan keyin shu yerga qo'shadi, SSE obunachilari esa uyg'otiladi:
+# dashboardni kuzatish bazaga qayta-qayta so'rov yubormaydi.
+def record(branch_id, at, deltas):
+    transaction.on_commit(lambda: _apply(branch_id, at, deltas))
+
+
+def _apply(branch_id, at, deltas):
+    with _lock:
+        if _day is None or timezone.localdate(at) != _day:
+            return
+        totals = _totals.setdefault(branch_id, dict.fromkeys(FIELDS, Decimal('0')))
+        for name, value in deltas.items():
+            totals[name] += value
+    _notify()
+
+
+def resync():
+    global _totals, _day, _synced_at
+    from api.models import HourlyRollup
+
+    day = timezone.localdate()
+    start = timezone.make_aware(datetime.combine(day, dt_time.min))
+    rows = (
+        HourlyRollup.objects.filter(hour__gte=start)
+        .values('branch_id')
+        .annotate(**{name: Sum(name) for name in FIELDS})
+        .order_by()
+    )
+    totals = {
+        row['branch_id']: {name: row[name] or Decimal('0') for name in FIELDS}
+        for row in rows
+    }
+
+    with _lock:
+        _totals, _day, _synced_at = totals, day, time.monotonic()
+    _notify()
+
+
+# Bir nechta obunachi bir vaqtda eskirganini ko'rsa, faqat bittasi o'qiydi
+def resync_if_stale():
+    if not _resync_lock.acquire(blocking=False):
+        return
+    try:
+        if stale():
+            resync()
+    finally:
+        _resync_lock.release()
+
+
+def stale():
+    return _day != timezone.localdate() or time.monotonic() - _synced_at > RESYNC_INTERVAL
+
+
+def snapshot(branch_id=None):
+    with _lock:
+        if branch_id is not None:
+            totals = {branch_id: _totals.get(branch_id, dict.fromkeys(FIELDS, Decimal('0')))}
+        else:
+            totals = _totals
+        return {
+            'date': _day,
+            'branches': {pk: dict(values) for pk, values in totals.items()},
+        }
+
+
+def subscribe(loop, event):
+    with _lock:
+        _subscribers.add((loop, event))
+
+
+def unsubscribe(loop, event):
+    with _lock:
+        _subscribers.discard((loop, event))
+
+
+def _notify():
+    with _lock:
+        subscribers = list(_subscribers)
+    for loop, event in subscribers:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            # Event loop yopilgan
+            unsubscribe(loop, event)
@@ -0,0 +1,38 @@
+from decimal import Decimal
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from api.models import SaleItem
+
+
+# 🔹 Filial × mahsulot × kun bo'yicha yalpi foyda bitta GROUP BY so'rovida.
+# Tannarx SaleItem.total_cost da sotuv paytida saqlangan, kirimlarga join yo'q.
+# Savdo darajasidagi chegirma mahsulotlarga taqsimlanmaydi (tushum — chegirmasiz narx).
+def profit_rows(start, end, branch=None):
+    queryset = SaleItem.objects.filter(sold_at__gte=start, sold_at__lt=end, sale__branch__isnull=False)
+    if branch is not None:
+        queryset = queryset.filter(sale__branch=branch)
+
+    return (
+        queryset
+        .annotate(day=TruncDate('sold_at', tzinfo=timezone.get_current_timezone()))
+        .values('day', 'sale__branch_id', 'sale__branch__name', 'product_id', 'product__name')
+        .annotate(quantity=Sum('quantity'), revenue=Sum('total_price'), cost=Sum('total_cost'))
+        .annotate(profit=F('revenue') - F('cost'))
+        .order_by('day', 'sale__branch_id', 'product__name', 'product_id')
+    )
+
+
+def profit_totals(start, end, branch=None):
+    queryset = SaleItem.objects.filter(sold_at__gte=start, sold_at__lt=end, sale__branch__isnull=False)
+    if branch is not None:
+        queryset = queryset.filter(sale__branch=branch)
+    # Oraliqda sotuv bo'lmasa ham jami Decimal bo'lishi kerak (format_money)
+    totals = queryset.aggregate(
+        revenue=Sum('total_price', default=Decimal('0')),
+        cost=Sum('total_cost', default=Decimal('0')),
+    )
+    totals['profit'] = totals['revenue'] - totals['cost']
+    return totals
@@ -0,0 +1,190 @@
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from openpyxl import load_workbook
+
+from api.models import AddProductItem, History, HourlyRollup, Product
+from api.models.rollup import floor_hour
+from . import costing, stock
+
+COLUMNS = {
+    'barcode': ('barcode', 'shtrixkod'),
+    'quantity': ('quantity', 'miqdor'),
+    'price': ('price', 'narx'),
+}
+MAX_ERRORS = 50
+
+
+def _normalize_header(header):
+    names = {}
+    for index, title in enumerate(header):
+        title = str(title or '').strip().lower()
+        for column, aliases in COLUMNS.items():
+            if title in aliases:
+                names[column] = index
+    missing = set(COLUMNS) - set(names)
+    if missing:
+        raise ValidationError(f"Faylda ustun yo‘q: {', '.join(sorted(missing))}")
+    return names
+
+
+def _iter_csv(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(text, dialect)
+
+
+def _iter_xlsx(fileobj):
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+# 🔹 Faylni qatorma-qator o'qiydi: (qator raqami, barcode, miqdor, narx)
+def read_rows(fileobj, filename=''):
+    rows = _iter_xlsx(fileobj) if filename.lower().endswith('.xlsx') else _iter_csv(fileobj)
+
+    header = next(rows, None)
+    if header is None:
+        raise ValidationError("Fayl bo‘sh")
+    columns = _normalize_header(header)
+
+    for line, row in enumerate(rows, start=2):
+        if not row or not any(row):
+            continue
+        yield line, tuple(
+            row[columns[name]] if columns[name] < len(row) else None
+            for name in ('barcode', 'quantity', 'price')
+        )
+
+
+def _parse(line, barcode, quantity, price, errors):
+    barcode = str(barcode or '').strip()
+    if not barcode:
+        errors.append(f"{line}-qator: shtrixkod bo‘sh")
+        return None
+    try:
+        quantity = Decimal(str(quantity).strip().replace(',', '.'))
+        price = Decimal(str(price or 0).strip().replace(',', '.'))
+    except InvalidOperation:
+        errors.append(f"{line}-qator: miqdor yoki narx noto‘g‘ri")
+        return None
+    if quantity <= 0 or price < 0:
+        errors.append(f"{line}-qator: miqdor musbat, narx manfiy bo‘lmasligi kerak")
+        return None
+    return line, barcode, quantity, price
+
+
+def _import_chunk(add_product, chunk, errors):
+    parsed = [row for row in (_parse(line, *values, errors) for line, values in chunk) if row]
+    if not parsed:
+        return Decimal('0'), 0
+
+    products = {
+        p.barcode: p for p in
+        Product.objects.select_for_update()
+        .filter(branch_id=add_product.branch_id, barcode__in={row[1] for row in parsed})
+        .order_by('pk')
+    }
+
+    items, deltas, values = [], {}, {}
+    for line, barcode, quantity, price in parsed:
+        product = products.get(barcode)
+        if product is None:
+            errors.append(f"{line}-qator: {barcode} shtrixkodli mahsulot topilmadi")
+            continue
+
+        # AddProductItem.save bilan bir xil kg -> dona hisobi, butun partiya uchun
+        if product.base_unit == 'kg':
+            if not product.kg_to_pcs:
+                errors.append(f"{line}-qator: {product.name} uchun 1 kg = nechta dona belgilanmagan")
+                continue
+            added_quantity = quantity * product.kg_to_pcs
+            unit_cost_price = price / product.kg_to_pcs
+        else:
+            added_quantity = quantity
+            unit_cost_price = price
+
+        product.cost_price = unit_cost_price
+        deltas[product.pk] = deltas.get(product.pk, Decimal('0')) + added_quantity
+        values[product.pk] = values.get(product.pk, Decimal('0')) + added_quantity * unit_cost_price
+        items.append(AddProductItem(
+            add_product=add_product,
+            product=product,
+            input_quantity=quantity,
+            added_quantity=added_quantity,
+            price=price,
+            total_price=added_quantity * unit_cost_price,
+        ))
+
+    if errors or not items:
+        # Xato topilgandan keyin yozish befoyda: tranzaksiya baribir bekor qilinadi
+        return Decimal('0'), 0
+
+    touched = [p for p in products.values() if p.pk in deltas]
+    # Qatorlar qulflangan, qoldiq hali o'zgarmagan: o'rtacha tannarx shu yerda
+    for product in touched:
+        product.average_cost = costing.moving_average(
+            product.quantity, product.average_cost, deltas[product.pk], values[product.pk]
+        )
+    Product.objects.bulk_update(touched, ['cost_price', 'average_cost'])
+    stock.put(deltas, touched)
+
+    AddProductItem.objects.bulk_create(items)
+
+    purchases = {}
+    for item in items:
+        hour = floor_hour(item.added_at)
+        purchases[hour] = purchases.get(hour, Decimal('0')) + item.total_price
+    for hour, amount in purchases.items():
+        HourlyRollup.apply(add_product.branch_id, hour, purchase_total=amount)
+
+    for item in items:
+        History.objects.record(
+            branch_id=add_product.branch_id,
+            worker_id=add_product.worker_id,
+            product=item.product,
+            change_type="Qo'shildi",
+            quantity_changed=item.added_quantity,
+        )
+
+    return sum((item.total_price for item in items), Decimal('0')), len(items)
+
+
+# 🔹 Yetkazib berish faylini bitta tranzaksiyada kirim qiladi. Har bir
+# partiya (batch_size qator) uchun so'rovlar soni o'zgarmas: mahsulotlar
+# shtrixkod bo'yicha bitta so'rov bilan topiladi, itemlar bulk_create,
+# qoldiq bitta UPDATE, History esa oxirida bitta INSERT bilan yoziladi.
+@transaction.atomic
+def import_delivery(add_product, rows, batch_size=1000):
+    errors = []
+    total_price = Decimal('0')
+    count = 0
+
+    rows = iter(rows)
+    with History.objects.batch():
+        while len(errors) < MAX_ERRORS:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            chunk_total, chunk_count = _import_chunk(add_product, chunk, errors)
+            total_price += chunk_total
+            count += chunk_count
+
+        if errors:
+            raise ValidationError(errors[:MAX_ERRORS])
+        if not count:
+            raise ValidationError("Faylda birorta ham mahsulot yo‘q")
+
+    return {'items': count, 'total_price': total_price}
@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import History, Product, StockSnapshot, StockSnapshotItem
+
+
+# 🔹 Qoldiqlar qulflangan qatorlardan o'qiladi va taken_at shundan keyin
+# belgilanadi: qoldiqni o'zgartirgan har bir tranzaksiya (History yozuvi bilan
+# birga) yo undan oldin commit bo'lgan, yo qulfni kutib undan keyin yoziladi.
+# Aks holda quantity_at oradagi sotuvni ikki marta hisoblashi mumkin.
+@transaction.atomic
+def take_snapshot(branch, batch_size=2000):
+    rows = list(
+        Product.objects.select_for_update().filter(branch=branch)
+        .order_by('pk').values_list('pk', 'quantity')
+    )
+    snapshot = StockSnapshot.objects.create(branch=branch, taken_at=timezone.now())
+
+    StockSnapshotItem.objects.bulk_create(
+        [StockSnapshotItem(snapshot=snapshot, product_id=pk, quantity=quantity) for pk, quantity in rows],
+        batch_size=batch_size,
+    )
+    return snapshot
+
+
+# 🔹 Mahsulotning `at` vaqtidagi qoldig'i. Eng yaqin snapshotdan (oldingi yoki
+# keyingi, hozirgi Product.quantity ham "keyingi" hisoblanadi) boshlab faqat
+# oradagi History farqi qo'llanadi, butun tarix qayta o'ynalmaydi.
+def quantity_at(product, at):
+    items = StockSnapshotItem.objects.filter(product=product).select_related('snapshot')
+    before = items.filter(snapshot__taken_at__lte=at).order_by('-snapshot__taken_at').first()
+    after = items.filter(snapshot__taken_at__gt=at).order_by('snapshot__taken_at').first()
+
+    if after is not None:
+        after_at, after_quantity = after.snapshot.taken_at, after.quantity
+    else:
+        after_at, after_quantity = timezone.now(), Product.objects.values_list('quantity', flat=True).get(pk=product.pk)
+
+    history = History.objects.filter(product=product)
+
+    if before is not None and (at - before.snapshot.taken_at) <= (after_at - at):
+        delta = history.filter(changed_at__gt=before.snapshot.taken_at, changed_at__lte=at).signed_total()
+        return before.quantity + delta, before.snapshot
+
+    delta = history.filter(changed_at__gt=at, changed_at__lte=after_at).signed_total()
+    return after_quantity - delta, after.snapshot if after is not None else None
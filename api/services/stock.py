@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+
+from api.models import Product
+from . import alerts, barcode
+
+BATCH_SIZE = 500
+
+
+# 🔹 Mahsulot qatorlarini doim pk tartibida qulflaydi: ikki kassa bir xil
+# mahsulotlarni boshqa tartibda qulflab, bir-birini kutib qolmasligi (deadlock) uchun.
+# SQLite'da select_for_update e'tiborsiz qoldiriladi, yozuvchilar baribir ketma-ket.
+def lock(product_ids, **filters):
+    return list(
+        Product.objects.select_for_update()
+        .filter(pk__in=list(product_ids), **filters)
+        .order_by('pk')
+    )
+
+
+def _update(ids, deltas, check):
+    quantity_field = DecimalField(max_digits=12, decimal_places=3)
+    checked = [pk for pk in ids if check and deltas[pk] < 0]
+
+    condition = Q(pk__in=ids)
+    if checked:
+        # Kamayayotgan har bir qator uchun: quantity >= so'ralgan miqdor
+        condition &= Q(pk__in=set(ids) - set(checked)) | Q(quantity__gte=Case(
+            *[When(pk=pk, then=Value(-deltas[pk])) for pk in checked],
+            output_field=quantity_field,
+        ))
+
+    return Product.objects.filter(condition).update(quantity=Case(
+        *[When(pk=pk, then=F('quantity') + Value(deltas[pk])) for pk in ids],
+        default=F('quantity'),
+        output_field=quantity_field,
+    ))
+
+
+def _shortage_error(names):
+    return ValidationError(f"Omborda yetarli mahsulot yo‘q: {', '.join(names)}")
+
+
+# 🔹 Qoldiqni {product_id: delta} bo'yicha bitta UPDATE bilan o'zgartiradi.
+# check=True bo'lsa kamayayotgan qatorlar manfiyga tushmasligi SQL shartida
+# tekshiriladi, shuning uchun eskirgan in-memory qiymatga tayanilmaydi.
+@transaction.atomic
+def adjust(deltas, products=None, check=False):
+    deltas = {pk: Decimal(delta) for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    ids = sorted(deltas)
+
+    # Bitta qatorli UPDATE faqat o'sha qatorni qulflaydi, alohida lock shart emas
+    if products is None and len(ids) > 1:
+        products = lock(ids)
+
+    if check and products is not None:
+        short = [p.name for p in products if deltas[p.pk] < 0 and p.quantity + deltas[p.pk] < 0]
+        if short:
+            raise _shortage_error(short)
+
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        if _update(batch, deltas, check) != len(batch):
+            if products is None:
+                names = Product.objects.filter(pk__in=batch).values_list('name', flat=True)
+            else:
+                names = [p.name for p in products if p.pk in batch]
+            raise _shortage_error(names)
+
+    alerts.evaluate(deltas)
+    barcode.invalidate(ids)
+
+
+def take(quantities, products=None):
+    adjust({pk: -Decimal(q) for pk, q in quantities.items()}, products=products, check=True)
+
+
+def put(quantities, products=None):
+    adjust(quantities, products=products)
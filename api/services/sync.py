@@ -0,0 +1,137 @@
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.instrumentation import instrumented
+from api.models import Sale, Worker
+from .checkout import checkout
+
+MAX_BATCH = 500
+
+
+def _parse_uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        raise ValidationError("Kassa identifikatori (uuid) noto‘g‘ri")
+
+
+def _parse_sold_at(value, now):
+    if not value:
+        return now
+    try:
+        sold_at = parse_datetime(str(value))
+    except ValueError:
+        sold_at = None
+    if sold_at is None:
+        raise ValidationError("Sotish vaqti noto‘g‘ri")
+    if timezone.is_naive(sold_at):
+        sold_at = timezone.make_aware(sold_at)
+    # Kassa soati oldinga ketgan bo'lsa, sotuv kelajakka yozilmaydi
+    return min(sold_at, now)
+
+
+def _finite(value):
+    try:
+        return Decimal(str(value)).is_finite()
+    except InvalidOperation:
+        return False
+
+
+# Kassadan kelgan JSON checkoutga berilishidan oldin tekshiriladi: bitta
+# buzilgan sotuv butun partiyani 500 bilan to'xtatmasin
+def _check_entry(entry):
+    items = entry.get('items')
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValidationError("Savatdagi mahsulot noto‘g‘ri ko‘rsatilgan")
+    if not all(_finite(item.get('quantity')) for item in items):
+        raise ValidationError("Miqdor noto‘g‘ri")
+    if not _finite(entry.get('amount', 0)):
+        raise ValidationError("To‘langan summa noto‘g‘ri")
+    if entry.get('customer') is not None and not isinstance(entry['customer'], dict):
+        raise ValidationError("Mijoz ma’lumotlari noto‘g‘ri")
+
+
+def _worker(workers, value):
+    try:
+        return workers.get(int(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+# 🔹 Oflayn kassa navbatidagi sotuvlar bitta tranzaksiyada yoziladi. Har bir
+# sotuv o'z savepointida: xato sotuv qolganlarini bekor qilmaydi. Qayta
+# yuborilgan sotuvlar client_uuid bo'yicha bitta so'rovda aniqlanadi.
+@instrumented('sync_sales')
+@transaction.atomic
+def sync_sales(branch, entries):
+    if not isinstance(entries, list):
+        raise ValidationError("Sotuvlar ro‘yxati kutilgan")
+    if len(entries) > MAX_BATCH:
+        raise ValidationError(f"Bir so‘rovda ko‘pi bilan {MAX_BATCH} ta sotuv yuboriladi")
+
+    keys = []
+    for entry in entries:
+        try:
+            keys.append(_parse_uuid(entry.get('uuid')) if isinstance(entry, dict) else None)
+        except ValidationError:
+            keys.append(None)
+
+    existing = dict(
+        Sale.objects.filter(client_uuid__in=[k for k in keys if k])
+        .values_list('client_uuid', 'pk')
+    )
+    workers = {w.pk: w for w in Worker.objects.filter(branch=branch)}
+    now = timezone.now()
+
+    results = []
+    for entry, key in zip(entries, keys):
+        if key is None:
+            results.append({
+                'uuid': entry.get('uuid') if isinstance(entry, dict) else None,
+                'status': 'error',
+                'detail': ["Kassa identifikatori (uuid) noto‘g‘ri"],
+            })
+            continue
+
+        result = {'uuid': str(key)}
+        if key in existing:
+            result.update(status='duplicate', sale=existing[key])
+            results.append(result)
+            continue
+
+        try:
+            _check_entry(entry)
+            worker = _worker(workers, entry.get('worker'))
+            if worker is None:
+                raise ValidationError("Hodim topilmadi")
+            with transaction.atomic():
+                sale = checkout(
+                    branch=branch,
+                    worker=worker,
+                    items=entry.get('items') or [],
+                    amount=entry.get('amount', 0),
+                    currency=entry.get('currency', 'UZS'),
+                    customer=entry.get('customer'),
+                    sold_at=_parse_sold_at(entry.get('sold_at'), now),
+                    client_uuid=key,
+                    check_stock=False,
+                )
+        except ValidationError as exc:
+            result.update(status='error', detail=exc.messages)
+        except IntegrityError:
+            # Shu uuid bilan parallel so'rov oldinroq yozib ulgurgan
+            result.update(
+                status='duplicate',
+                sale=Sale.objects.filter(client_uuid=key).values_list('pk', flat=True).first(),
+            )
+        else:
+            existing[key] = sale.pk
+            result.update(status='created', sale=sale.pk)
+        results.append(result)
+
+    return results
@@ -1,16 +1,29 @@
 from decimal import Decimal
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.db.models import F
-from api.models import SaleItem, AddProductItem, History
+from api.models import Branch, Customer, DebtEntry, Sale, SaleItem, AddProductItem, Expense, History, HourlyRollup, Product
+from api.services import barcode, costing, stock
+
+
+# Filial (yoki mijoz) butunlay o'chirilsa, unga bog'liq rollup / qarz
+# qatorlari ham cascade bilan ketadi, ularni yangilash shart emas
+def _deleted_with(origin, *models):
+    model = getattr(origin, 'model', None) or type(origin)
+    return model in models
+
+
+def _branch_deleted(origin):
+    return _deleted_with(origin, Branch)
 
 
 @receiver(post_delete, sender=SaleItem)
 def saleitem_deleted(sender, instance, **kwargs):
-    instance.product.quantity = F('quantity') + Decimal(instance.quantity)
-    instance.product.save(update_fields=['quantity'])
+    stock.put({instance.product_id: instance.quantity})
 
-    History.objects.create(
+    if not _branch_deleted(kwargs.get('origin')):
+        HourlyRollup.apply(instance.sale.branch_id, instance.sold_at, items_sold=-instance.quantity)
+
+    History.objects.record(
         branch=instance.sale.branch if instance.sale else None,
         worker=instance.sale.worker if instance.sale else None,
         product=instance.product,
@@ -21,10 +34,17 @@ def saleitem_deleted(sender, instance, **kwargs):
 
 @receiver(post_delete, sender=AddProductItem)
 def addproductitem_deleted(sender, instance, **kwargs):
-    instance.product.quantity = F('quantity') - Decimal(instance.added_quantity)
-    instance.product.save(update_fields=['quantity'])
+    if not _deleted_with(kwargs.get('origin'), Branch, Product):
+        costing.receive({instance.product_id: (-Decimal(instance.added_quantity), -instance.total_price)})
+    stock.put({instance.product_id: -Decimal(instance.added_quantity)})
+
+    if not _branch_deleted(kwargs.get('origin')):
+        HourlyRollup.apply(
+            instance.add_product.branch_id, instance.added_at,
+            purchase_total=-instance.total_price
+        )
 
-    History.objects.create(
+    History.objects.record(
         branch=instance.add_product.branch,
         worker=instance.add_product.worker,
         product=instance.product,
@@ -32,3 +52,35 @@ def addproductitem_deleted(sender, instance, **kwargs):
         quantity_changed=Decimal(instance.added_quantity)
     )
 
+
+@receiver(post_delete, sender=Sale)
+def sale_deleted(sender, instance, **kwargs):
+    if _branch_deleted(kwargs.get('origin')):
+        return
+
+    if instance.customer_id and instance.amount and not _deleted_with(kwargs.get('origin'), Customer):
+        DebtEntry.objects.create(
+            customer_id=instance.customer_id,
+            amount=-Decimal(instance.amount),
+            kind=DebtEntry.REVERSAL,
+        )
+
+    HourlyRollup.apply(
+        instance.branch_id, instance.sold_at,
+        sales_total=-instance.total_price,
+        discounts_total=-instance.discount
+    )
+
+
+@receiver(post_delete, sender=Expense)
+def expense_deleted(sender, instance, **kwargs):
+    if _branch_deleted(kwargs.get('origin')):
+        return
+
+    HourlyRollup.apply(instance.branch_id, instance.incurred_at, expense_total=-instance.amount)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, **kwargs):
+    barcode.invalidate([instance.pk])
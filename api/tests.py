@@ -1,3 +1,988 @@
-from django.test import TestCase
+import io
+import json
+import uuid
+import warnings
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+
+from .models import (
+    AddProduct, AddProductItem, Branch, Customer, DailyReport, DebtEntry, Expense,
+    History, HourlyRollup, IdempotencyKey, Job, Product, Sale, SaleItem, StockAlert, Worker,
+)
+from .models.rollup import ceil_hour, floor_hour
+from .services import alerts, barcode, costing, debts, idempotency, jobs, stock
+from .services.checkout import checkout
+from .services.profit import profit_rows, profit_totals
+from .services.snapshots import quantity_at, take_snapshot
+
+
+class ChangelistQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        cls.branch = Branch.objects.create(name="Markaz", location="Toshkent")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def seed(self, rows):
+        workers = Worker.objects.bulk_create([
+            Worker(branch=self.branch, name=f"Hodim {i}", phone_number="1", position="Kassir")
+            for i in range(rows)
+        ])
+        products = Product.objects.bulk_create([
+            Product(branch=self.branch, name=f"Mahsulot {i}", cost_price=1, sale_price=2)
+            for i in range(rows)
+        ])
+        History.objects.bulk_create([
+            History(branch=self.branch, worker=w, product=p, change_type="Sotildi", quantity_changed=1)
+            for w, p in zip(workers, products)
+        ])
+        Sale.objects.bulk_create([
+            Sale(branch=self.branch, worker=w, amount=Decimal('10'), total_price=Decimal('10'))
+            for w in workers
+        ])
+        Expense.objects.bulk_create([
+            Expense(branch=self.branch, worker=w, category='boshqa xarajatlar', amount=Decimal('5'))
+            for w in workers
+        ])
+        DailyReport.objects.bulk_create([
+            DailyReport(branch=self.branch, start_datetime=w.created_at, end_datetime=w.created_at)
+            for w in workers
+        ])
+
+    def count_queries(self, url):
+        # KeysetPaginator COUNT natijasini keshlaydi, har o'lchov toza boshlansin
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(captured.captured_queries)
+
+    def assertConstantQueries(self, url):
+        self.seed(1)
+        baseline = self.count_queries(url)
+        self.seed(99)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_history_changelist(self):
+        self.assertConstantQueries('/admin/api/history/')
+
+    def test_sale_changelist(self):
+        self.assertConstantQueries('/admin/api/sale/')
+
+    def test_expense_changelist(self):
+        self.assertConstantQueries('/admin/api/expense/')
+
+    def test_worker_changelist(self):
+        self.assertConstantQueries('/admin/api/worker/')
+
+    def test_dailyreport_changelist(self):
+        self.assertConstantQueries('/admin/api/dailyreport/')
+
+    def test_product_changelist(self):
+        self.assertConstantQueries('/admin/api/product/')
+
+    def inline_rows(self, rows):
+        worker = Worker.objects.create(branch=self.branch, name="Kassir", phone_number="1", position="Kassir")
+        products = Product.objects.bulk_create([
+            Product(branch=self.branch, name=f"Mahsulot {i}", cost_price=1, sale_price=2)
+            for i in range(rows)
+        ])
+        return worker, products
+
+    def assertConstantInlineQueries(self, create):
+        # Birinchi so'rov ContentType keshini to'ldiradi
+        counts = []
+        for rows in (1, 1, 100):
+            worker, products = self.inline_rows(rows)
+            counts.append(self.count_queries(create(worker, products)))
+        self.assertEqual(counts[1], counts[2])
+
+    def test_sale_change_view_inline(self):
+        def create(worker, products):
+            sale = Sale.objects.create(branch=self.branch, worker=worker, amount=0)
+            SaleItem.objects.bulk_create([
+                SaleItem(sale=sale, product=p, quantity=1, total_price=2) for p in products
+            ])
+            return f'/admin/api/sale/{sale.pk}/change/'
+        self.assertConstantInlineQueries(create)
+
+    def test_addproduct_change_view_inline(self):
+        def create(worker, products):
+            add_product = AddProduct.objects.create(branch=self.branch, worker=worker)
+            AddProductItem.objects.bulk_create([
+                AddProductItem(add_product=add_product, product=p, input_quantity=1, added_quantity=1, price=1)
+                for p in products
+            ])
+            return f'/admin/api/addproduct/{add_product.pk}/change/'
+        self.assertConstantInlineQueries(create)
+
+
+class CustomerResolveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.branch = Branch.objects.create(name="Markaz", location="Toshkent")
+        cls.worker = Worker.objects.create(branch=cls.branch, name="Kassir", phone_number="1", position="Kassir")
+
+    def test_phone_formats_resolve_to_one_customer(self):
+        first = Customer.objects.resolve(self.branch, "Ali", "+998 (90) 123-45-67")
+        self.assertEqual(first.phone_key, '998901234567')
+        for phone in ("90 123 45 67", "998901234567"):
+            self.assertEqual(Customer.objects.resolve(self.branch, "Ali", phone).pk, first.pk)
+        self.assertEqual(Customer.objects.count(), 1)
+
+    def test_same_phone_in_other_branch_is_separate(self):
+        other = Branch.objects.create(name="Chilonzor", location="Toshkent")
+        first = Customer.objects.resolve(self.branch, "Ali", "901234567")
+        self.assertNotEqual(Customer.objects.resolve(other, "Ali", "901234567").pk, first.pk)
+
+    def test_deleted_customer_is_recreated(self):
+        Customer.objects.resolve(self.branch, "Ali", "901234567").delete()
+        sale = Sale(
+            branch=self.branch, worker=self.worker, total_price=Decimal('100'), amount=Decimal('40'),
+            customer=Customer(name="Ali", phone_number="90-123-45-67"),
+        )
+        sale.save()
+        self.assertEqual(sale.customer.phone_key, '998901234567')
+        self.assertEqual(Customer.objects.get().debt, Decimal('40'))
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('kassa', password='kassa', is_staff=True)
+        cls.branch = Branch.objects.create(name="Markaz", location="Toshkent")
+        cls.worker = Worker.objects.create(branch=cls.branch, name="Kassir", phone_number="1", position="Kassir")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def products(self, count, quantity=100):
+        return Product.objects.bulk_create([
+            Product(
+                branch=self.branch, name=f"Mahsulot {i}", quantity=quantity,
+                cost_price=6, average_cost=6, sale_price=10,
+            )
+            for i in range(count)
+        ])
+
+    def post_json(self, url, data, **extra):
+        return self.client.post(url, json.dumps(data), content_type='application/json', **extra)
+
+
+class CheckoutTests(ApiTestCase):
+    def checkout(self, items, **data):
+        return self.post_json('/checkout/', {
+            'branch': self.branch.pk, 'worker': self.worker.pk, 'items': items, **data,
+        })
+
+    def count_queries(self, products):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.checkout([{'product': p.pk, 'quantity': 1} for p in products], amount=0)
+        self.assertEqual(response.status_code, 201)
+        return len(captured.captured_queries)
+
+    def test_query_count_does_not_depend_on_basket_size(self):
+        products = self.products(41)
+        # Birinchi savdo soatlik rollup qatorini yaratadi
+        self.count_queries(products[:1])
+        self.assertEqual(self.count_queries(products[1:2]), self.count_queries(products[2:]))
+
+    def test_shortage_rolls_back_whole_sale(self):
+        plenty, scarce = self.products(2)
+        Product.objects.filter(pk=scarce.pk).update(quantity=1)
+
+        response = self.checkout([
+            {'product': plenty.pk, 'quantity': 5},
+            {'product': scarce.pk, 'quantity': 2},
+        ], amount=0)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Sale.objects.exists())
+        self.assertFalse(SaleItem.objects.exists())
+        self.assertFalse(History.objects.exists())
+        self.assertEqual(Product.objects.get(pk=plenty.pk).quantity, 100)
+        self.assertEqual(Product.objects.get(pk=scarce.pk).quantity, 1)
+
+    def test_customer_sale_creates_debt_entry(self):
+        product, = self.products(1)
+        response = self.checkout(
+            [{'product': product.pk, 'quantity': 3}], amount=30,
+            customer={'name': "Ali", 'phone_number': "90 123 45 67"},
+        )
+
+        self.assertEqual(response.status_code, 201)
+        sale = Sale.objects.get(pk=response.json()['sale'])
+        entry = DebtEntry.objects.get()
+        self.assertEqual((entry.sale_id, entry.kind, entry.amount), (sale.pk, DebtEntry.CHARGE, Decimal('30')))
+        self.assertEqual(sale.customer.debt, Decimal('30'))
+        self.assertEqual(Product.objects.get(pk=product.pk).quantity, 97)
+
+    def test_malformed_payload_is_rejected(self):
+        product, = self.products(1)
+        item = {'product': product.pk, 'quantity': 1}
+        for ids in [{'branch': "abc"}, {'worker': [1]}, {'worker': float('inf')}]:
+            with self.subTest(ids=ids):
+                self.assertEqual(self.checkout([item], amount=10, **ids).status_code, 400)
+        for items, data in [
+            ([item], {'amount': 10, 'customer': "Ali"}),
+            ([{'product': product.pk, 'quantity': "NaN"}], {'amount': 10}),
+            ([item], {'amount': "Infinity"}),
+            ([{'product': float('inf'), 'quantity': 1}], {'amount': 10}),
+            ([item], {'amount': 10, 'currency': ['UZS']}),
+            ("mahsulot", {'amount': 10}),
+        ]:
+            with self.subTest(items=items, data=data):
+                self.assertEqual(self.checkout(items, **data).status_code, 400)
+        self.assertFalse(Sale.objects.exists())
+
+
+class StockAdjustTests(ApiTestCase):
+    def quantities(self, products):
+        return list(Product.objects.filter(pk__in=[p.pk for p in products]).order_by('pk').values_list('quantity', flat=True))
+
+    def test_shortage_leaves_every_row_unchanged(self):
+        products = self.products(3, quantity=10)
+        Product.objects.filter(pk=products[1].pk).update(quantity=1)
+
+        with self.assertRaisesMessage(ValidationError, products[1].name):
+            stock.take({p.pk: 2 for p in products})
+        self.assertEqual(self.quantities(products), [10, 1, 10])
+
+    def test_shortage_is_checked_in_sql_not_in_memory(self):
+        products = self.products(2, quantity=10)
+        # Boshqa kassa qoldiqni kamaytirgan, qo'limizdagi obyektlar eskirgan
+        Product.objects.filter(pk=products[0].pk).update(quantity=1)
+
+        with self.assertRaises(ValidationError):
+            stock.take({p.pk: 5 for p in products}, products=products)
+        self.assertEqual(self.quantities(products), [1, 10])
+
+    def test_rows_are_locked_in_pk_order(self):
+        products = self.products(3)
+        with CaptureQueriesContext(connection) as captured:
+            stock.take({p.pk: 1 for p in reversed(products)})
+
+        select = next(q['sql'] for q in captured.captured_queries if q['sql'].startswith('SELECT'))
+        self.assertTrue(select.endswith('ORDER BY "api_product"."id" ASC'), select)
+        self.assertEqual(self.quantities(products), [99, 99, 99])
+
+    def test_duplicate_products_are_merged(self):
+        product, = self.products(1, quantity=10)
+        sale = checkout(
+            branch=self.branch, worker=self.worker, amount=0,
+            items=[{'product': product.pk, 'quantity': 4}, {'product': str(product.pk), 'quantity': '5'}],
+        )
+        self.assertEqual(sale.items.get().quantity, 9)
+        self.assertEqual(self.quantities([product]), [1])
+
+        # Har bir qator alohida sig'adi, lekin jami qoldiqdan ko'p
+        with self.assertRaises(ValidationError):
+            checkout(
+                branch=self.branch, worker=self.worker, amount=0,
+                items=[{'product': product.pk, 'quantity': 1}, {'product': product.pk, 'quantity': 1}],
+            )
+        self.assertEqual(self.quantities([product]), [1])
+
+
+class ReceivingImportTests(ApiTestCase):
+    def products(self, count, quantity=0):
+        products = super().products(count, quantity)
+        for i, product in enumerate(products):
+            product.barcode = f"478{i:010d}"
+        Product.objects.bulk_update(products, ['barcode'])
+        return products
+
+    def upload(self, rows, name='yetkazish.csv'):
+        lines = ["barcode;miqdor;narx", *(";".join(str(v) for v in row) for row in rows)]
+        return SimpleUploadedFile(name, "\n".join(lines).encode())
+
+    def post_file(self, upload):
+        return self.client.post('/receiving/import/', {
+            'branch': self.branch.pk, 'worker': self.worker.pk, 'file': upload,
+        })
+
+    def count_queries(self, rows):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.post_file(self.upload(rows))
+        self.assertEqual(response.status_code, 201, response.content)
+        return len(captured.captured_queries)
+
+    def test_kg_quantity_is_converted_to_pieces(self):
+        product, = self.products(1)
+        Product.objects.filter(pk=product.pk).update(base_unit='kg', kg_to_pcs=10, average_cost=0)
+
+        response = self.post_file(self.upload([(product.barcode, "2,5", 50)]))
+
+        self.assertEqual(response.status_code, 201, response.content)
+        product.refresh_from_db()
+        item = AddProductItem.objects.get()
+        self.assertEqual((item.input_quantity, item.added_quantity), (Decimal('2.5'), Decimal('25')))
+        self.assertEqual((product.quantity, product.cost_price, product.average_cost), (25, 5, 5))
+
+    def test_row_errors_are_collected_and_nothing_is_written(self):
+        product, kg = self.products(2)
+        Product.objects.filter(pk=kg.pk).update(base_unit='kg')
+
+        response = self.post_file(self.upload([
+            ("", 1, 10),
+            (product.barcode, "bir", 10),
+            (product.barcode, -1, 10),
+            ("0000", 1, 10),
+            (kg.barcode, 1, 10),
+            (product.barcode, 1, 10),
+        ]))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [message.split(':')[0] for message in response.json()['detail']],
+            ["2-qator", "3-qator", "4-qator", "5-qator", "6-qator"],
+        )
+        self.assertFalse(AddProduct.objects.exists())
+        self.assertEqual(Product.objects.get(pk=product.pk).quantity, 0)
+
+    def test_duplicate_barcodes_are_merged(self):
+        product, = self.products(1)
+        response = self.post_file(self.upload([(product.barcode, 3, 10), (product.barcode, 1, 30)]))
+
+        self.assertEqual(response.status_code, 201, response.content)
+        product.refresh_from_db()
+        self.assertEqual(AddProductItem.objects.count(), 2)
+        self.assertEqual(product.quantity, 4)
+        self.assertEqual(product.average_cost, 15)
+        self.assertEqual(History.objects.filter(product=product).count(), 2)
+
+    def test_query_count_does_not_depend_on_row_count(self):
+        products = self.products(41)
+        self.count_queries([(products[0].barcode, 1, 10)])
+        self.assertEqual(
+            self.count_queries([(products[1].barcode, 1, 10)]),
+            self.count_queries([(p.barcode, 1, 10) for p in products[2:]]),
+        )
+
+    def test_malformed_ids_are_rejected(self):
+        product, = self.products(1)
+        for field in ('branch', 'worker', 'supplier'):
+            with self.subTest(field=field):
+                response = self.client.post('/receiving/import/', {
+                    'branch': self.branch.pk, 'worker': self.worker.pk,
+                    'file': self.upload([(product.barcode, 1, 10)]), field: "abc",
+                })
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(AddProduct.objects.exists())
+
+    def test_xlsx_file(self):
+        product, = self.products(1)
+        workbook = Workbook()
+        workbook.active.append(["Shtrixkod", "Miqdor", "Narx"])
+        workbook.active.append([product.barcode, 6, 12])
+        content = io.BytesIO()
+        workbook.save(content)
+
+        response = self.post_file(SimpleUploadedFile('yetkazish.xlsx', content.getvalue()))
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Product.objects.get(pk=product.pk).quantity, 6)
+
+
+class ExportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        product, = self.products(1)
+        self.sale = checkout(
+            branch=self.branch, worker=self.worker, amount=0,
+            items=[{'product': product.pk, 'quantity': 2}],
+        )
+        self.params = {'branch': self.branch.pk, 'start': '2000-01-01T00:00', 'end': '2100-01-01T00:00'}
+
+    def test_sales_csv(self):
+        response = self.client.get('/export/sales.csv', self.params)
+
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith(f"{self.sale.pk},"))
+
+    def test_xlsx(self):
+        # Profit sahifasidagi XLSX havolasi ham shu endpoint
+        for kind in ('sales', 'profit'):
+            with self.subTest(kind=kind):
+                response = self.client.get(f'/export/{kind}.xlsx', self.params)
+
+                self.assertEqual(response.status_code, 200)
+                sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+                self.assertEqual(len(list(sheet.iter_rows(values_only=True))), 2)
+
+    def test_invalid_request(self):
+        self.assertEqual(self.client.get('/export/nimadir.csv', self.params).status_code, 400)
+        for params in ({'start': 'kecha'}, {'start': '2025-02-31T00:00'}, {'branch': 'abc'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/export/sales.csv', {**self.params, **params}).status_code, 400)
+
+
+class CostingTests(ApiTestCase):
+    def receive(self, product, quantity, price):
+        add_product = AddProduct.objects.create(branch=self.branch, worker=self.worker)
+        AddProductItem.objects.create(add_product=add_product, product=product, input_quantity=quantity, price=price)
+        product.refresh_from_db()
+
+    def sell(self, product, quantity):
+        return checkout(branch=self.branch, worker=self.worker, items=[{'product': product.pk, 'quantity': quantity}], amount=0)
+
+    def test_moving_average(self):
+        self.assertEqual(costing.moving_average(10, 5, Decimal(10), Decimal(70)), Decimal('6.0000'))
+        self.assertEqual(costing.moving_average(0, 0, Decimal(3), Decimal(10)), Decimal('3.3333'))
+        # Manfiy qoldiq 0 deb olinadi, bo'sh kirim o'rtachani o'zgartirmaydi
+        self.assertEqual(costing.moving_average(-5, 5, Decimal(10), Decimal(70)), Decimal('7.0000'))
+        self.assertEqual(costing.moving_average(10, 5, Decimal(0), Decimal(0)), 5)
+
+    def test_recompute_matches_live_costs(self):
+        product = Product.objects.create(branch=self.branch, name="Un", quantity=0, cost_price=0, sale_price=10)
+        self.receive(product, 10, 5)
+        self.sell(product, 4)
+        self.receive(product, 6, 8)
+        sale = self.sell(product, 2)
+        self.assertEqual(product.average_cost, Decimal('6.5000'))
+
+        Product.objects.filter(pk=product.pk).update(average_cost=1)
+        SaleItem.objects.filter(sale=sale).update(unit_cost=1, total_cost=2)
+        self.assertEqual(costing.recompute(sale_items=True), (1, 1, 1, []))
+
+        product.refresh_from_db()
+        self.assertEqual(product.average_cost, Decimal('6.5000'))
+        self.assertEqual(
+            list(SaleItem.objects.order_by('pk').values_list('unit_cost', 'total_cost')),
+            [(Decimal('5.0000'), Decimal('20.00')), (Decimal('6.5000'), Decimal('13.00'))],
+        )
+
+    def test_recompute_skips_unknown_opening_stock(self):
+        product = Product.objects.create(branch=self.branch, name="Shakar", quantity=10, cost_price=5, average_cost=5, sale_price=10)
+        self.receive(product, 10, 7)
+        self.assertEqual(product.average_cost, Decimal('6.0000'))
+        self.sell(product, 3)
+
+        self.assertEqual(costing.recompute(sale_items=True), (0, 0, 0, [product.pk]))
+        product.refresh_from_db()
+        self.assertEqual(product.average_cost, Decimal('6.0000'))
+        self.assertEqual(SaleItem.objects.get().unit_cost, Decimal('6.0000'))
+
+        out = io.StringIO()
+        call_command('recompute_costs', '--sale-items', stdout=out)
+        self.assertIn("1 ta mahsulot o'tkazib yuborildi", out.getvalue())
+
+
+class ProfitReportTests(ApiTestCase):
+    def test_profit_per_branch_product_and_day(self):
+        other = Branch.objects.create(name="Chilonzor", location="Toshkent")
+        other_worker = Worker.objects.create(branch=other, name="Kassir 2", phone_number="2", position="Kassir")
+        first, second = self.products(2)
+        third = Product.objects.create(branch=other, name="Mahsulot 0", quantity=100, cost_price=4, average_cost=4, sale_price=9)
+        day = timezone.make_aware(datetime(2025, 3, 10, 12))
+
+        checkout(branch=self.branch, worker=self.worker, items=[
+            {'product': first.pk, 'quantity': 2}, {'product': second.pk, 'quantity': 1},
+        ], amount=30, sold_at=day)
+        checkout(branch=self.branch, worker=self.worker, items=[{'product': first.pk, 'quantity': 3}], amount=30, sold_at=day)
+        # Tannarx sotuv paytida saqlanadi: keyingi o'zgarish o'tgan foydaga ta'sir qilmaydi
+        Product.objects.filter(pk=first.pk).update(average_cost=8)
+        checkout(branch=self.branch, worker=self.worker, items=[{'product': first.pk, 'quantity': 1}], amount=10,
+                 sold_at=day + timedelta(days=1))
+        checkout(branch=other, worker=other_worker, items=[{'product': third.pk, 'quantity': 2}], amount=18, sold_at=day)
+
+        start, end = day - timedelta(days=1), day + timedelta(days=2)
+        rows = [
+            (row['day'].day, row['sale__branch_id'], row['product_id'], row['revenue'], row['cost'], row['profit'])
+            for row in profit_rows(start, end)
+        ]
+        self.assertEqual(rows, [
+            (10, self.branch.pk, first.pk, Decimal(50), Decimal(30), Decimal(20)),
+            (10, self.branch.pk, second.pk, Decimal(10), Decimal(6), Decimal(4)),
+            (10, other.pk, third.pk, Decimal(18), Decimal(8), Decimal(10)),
+            (11, self.branch.pk, first.pk, Decimal(10), Decimal(8), Decimal(2)),
+        ])
+        self.assertEqual(
+            profit_totals(start, end, other),
+            {'revenue': Decimal(18), 'cost': Decimal(8), 'profit': Decimal(10)},
+        )
+
+    def test_invalid_filters_fall_back_to_defaults(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'admin'))
+        for params in ({'branch': 'abc'}, {'branch': '99999999999999999999'}, {'start': '2025-02-31', 'end': 'kecha'}):
+            with self.subTest(params=params):
+                response = self.client.get('/admin/api/sale/profit/', params)
+                self.assertEqual(response.status_code, 200)
+                self.assertIsNone(response.context['branch'])
+
+        response = self.client.get('/admin/api/sale/profit/', {'branch': self.branch.pk})
+        self.assertEqual(response.context['branch'], self.branch)
+
+
+class DebtLedgerTests(ApiTestCase):
+    def sale(self, amount, customer):
+        sale = Sale(
+            branch=self.branch, worker=self.worker, total_price=Decimal('100'), amount=Decimal(amount),
+            customer=customer,
+        )
+        sale.save()
+        return sale
+
+    def debt(self, customer):
+        return Customer.objects.get(pk=customer.pk).debt
+
+    def ledger(self, customer):
+        return list(customer.debt_entries.order_by('pk').values_list('kind', 'amount'))
+
+    def test_charge_and_payment(self):
+        customer = Customer.objects.create(branch=self.branch, name="Ali", phone_number="901234567")
+        self.sale(70, customer)
+        DebtEntry.objects.create(customer=customer, kind=DebtEntry.PAYMENT, amount=Decimal('-50'))
+
+        self.assertEqual(self.debt(customer), Decimal('20'))
+        self.assertEqual(self.ledger(customer), [(DebtEntry.CHARGE, 70), (DebtEntry.PAYMENT, -50)])
+        with self.assertRaises(ValueError):
+            customer.debt_entries.first().save()
+
+    def test_sale_customer_change_moves_debt(self):
+        ali = Customer.objects.create(branch=self.branch, name="Ali", phone_number="901234567")
+        vali = Customer.objects.create(branch=self.branch, name="Vali", phone_number="901234568")
+        sale = self.sale(40, ali)
+
+        sale.customer = vali
+        sale.amount = Decimal('60')
+        sale.save()
+
+        self.assertEqual((self.debt(ali), self.debt(vali)), (0, 60))
+        self.assertEqual(self.ledger(ali), [(DebtEntry.CHARGE, 40), (DebtEntry.REVERSAL, -40)])
+
+    def test_sale_delete_reverses_debt(self):
+        customer = Customer.objects.create(branch=self.branch, name="Ali", phone_number="901234567")
+        self.sale(40, customer)
+        self.sale(25, customer).delete()
+        Sale.objects.filter(customer=customer).delete()
+
+        self.assertEqual(self.debt(customer), 0)
+        self.assertEqual(sum(amount for _, amount in self.ledger(customer)), 0)
+
+    def test_reconcile(self):
+        ok = Customer.objects.create(branch=self.branch, name="Ali", phone_number="901234567")
+        drifted = Customer.objects.create(branch=self.branch, name="Vali", phone_number="901234568")
+        self.sale(30, ok)
+        self.sale(30, drifted)
+        Customer.objects.filter(pk=drifted.pk).update(debt=99)
+
+        checked, found = debts.reconcile(self.branch.pk)
+        self.assertEqual((checked, [(c.pk, expected) for c, expected in found]), (2, [(drifted.pk, 30)]))
+        self.assertEqual(self.debt(drifted), 99)
+
+        with CaptureQueriesContext(connection) as captured:
+            debts.reconcile(self.branch.pk, fix=True)
+        self.assertEqual(self.debt(drifted), 30)
+        self.assertEqual(debts.reconcile()[1], [])
+
+        # Mijozlar ledger yig'indisidan oldin qulflanadi
+        selects = [q['sql'] for q in captured.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertIn('"api_customer"', selects[0])
+        self.assertNotIn('SUM(', selects[0])
+        self.assertIn('SUM(', selects[1])
+
+
+class JobQueueTests(ApiTestCase):
+    def run_next(self):
+        job = jobs.claim('test')
+        self.assertTrue(jobs.run(job))
+        return Job.objects.get(pk=job.pk)
+
+    def test_done_result_is_reused_unless_forced(self):
+        first = jobs.enqueue('reconcile_debts', {'branch': self.branch.pk})
+        self.assertEqual(jobs.enqueue('reconcile_debts', {'branch': self.branch.pk}).pk, first.pk)
+        self.assertEqual(self.run_next().status, Job.DONE)
+
+        self.assertEqual(jobs.enqueue('reconcile_debts', {'branch': self.branch.pk}).pk, first.pk)
+        forced = jobs.enqueue('reconcile_debts', {'branch': self.branch.pk}, force=True)
+        self.assertNotEqual(forced.pk, first.pk)
+        # Navbatdagi vazifa force bilan ham takrorlanmaydi
+        self.assertEqual(jobs.enqueue('reconcile_debts', {'branch': self.branch.pk}, force=True).pk, forced.pk)
+
+    def test_params_are_checked_at_enqueue(self):
+        for params in ({'name': "x"}, {'force': True}, {'foo': 1}, {'branch': 1, 'fix': True, 'job': 1}):
+            with self.subTest(params=params):
+                response = self.post_json('/jobs/', {'name': 'reconcile_debts', 'params': params})
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+        response = self.post_json('/jobs/', {'name': 'reconcile_debts', 'params': {'branch': self.branch.pk}})
+        self.assertEqual(response.status_code, 202)
+
+    def test_recalculate_action_queues_again(self):
+        now = timezone.now()
+        report = DailyReport.objects.create(branch=self.branch, start_datetime=now, end_datetime=now)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'admin'))
+        action = {'action': 'recalculate_in_background', '_selected_action': [report.pk]}
+
+        self.client.post('/admin/api/dailyreport/', action)
+        self.run_next()
+        self.client.post('/admin/api/dailyreport/', action)
+
+        self.assertEqual(Job.objects.filter(name='daily_report', status=Job.PENDING).count(), 1)
+
+    def test_daily_report_times_are_aware(self):
+        jobs.enqueue('daily_report', {
+            'branch': self.branch.pk, 'start': '2026-01-01T00:00', 'end': '2026-01-02T00:00',
+        })
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            job = self.run_next()
+
+        report = DailyReport.objects.get(pk=job.result['report'])
+        self.assertEqual(report.start_datetime, timezone.make_aware(datetime(2026, 1, 1)))
+
+
+class SyncSalesTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product, = self.products(1, quantity=10)
+
+    def entry(self, quantity=1, **data):
+        return {
+            'uuid': str(uuid.uuid4()), 'worker': self.worker.pk, 'amount': 0,
+            'items': [{'product': self.product.pk, 'quantity': quantity}], **data,
+        }
+
+    def sync(self, sales):
+        response = self.post_json('/sync/sales/', {'branch': self.branch.pk, 'sales': sales})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(r['status'], r.get('sale')) for r in response.json()['results']]
+
+    def test_replayed_uuid_is_not_applied_twice(self):
+        entry = self.entry(quantity=2, sold_at='2026-03-01T09:30:00')
+        (status, sale), = self.sync([entry])
+        self.assertEqual(status, 'created')
+
+        self.assertEqual(self.sync([entry, entry]), [('duplicate', sale), ('duplicate', sale)])
+        self.assertEqual(Sale.objects.count(), 1)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).quantity, 8)
+        self.assertEqual(Sale.objects.get().sold_at, timezone.make_aware(datetime(2026, 3, 1, 9, 30)))
+
+    def test_partial_failure_keeps_the_rest_of_the_batch(self):
+        bad = [
+            self.entry(customer="Ali"),
+            self.entry(quantity="NaN"),
+            self.entry(amount="Infinity"),
+            self.entry(items="non"),
+            self.entry(worker=float('inf')),
+            self.entry(uuid="kalit"),
+            "sotuv",
+        ]
+        good = self.entry(quantity=20)
+
+        results = self.sync([*bad[:3], good, *bad[3:]])
+
+        self.assertEqual([status for status, _ in results], ['error'] * 3 + ['created'] + ['error'] * 4)
+        self.assertEqual(Sale.objects.get().pk, results[3][1])
+        # Oflayn sotuv qoldiqdan ko'p bo'lsa ham yoziladi
+        self.assertEqual(Product.objects.get(pk=self.product.pk).quantity, -10)
+
+    def test_invalid_branch(self):
+        for branch in ("abc", [1], float('inf'), 1e30, 999999):
+            with self.subTest(branch=branch):
+                response = self.post_json('/sync/sales/', {'branch': branch, 'sales': []})
+                self.assertEqual(response.status_code, 400)
+
+
+class IdempotencyTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product, = self.products(1)
+        self.body = {
+            'branch': self.branch.pk, 'worker': self.worker.pk, 'amount': 0,
+            'items': [{'product': self.product.pk, 'quantity': 1}],
+        }
+
+    def checkout(self, body=None, key='kalit-1'):
+        return self.post_json('/checkout/', body or self.body, HTTP_IDEMPOTENCY_KEY=key)
+
+    def quantity(self):
+        return Product.objects.get(pk=self.product.pk).quantity
+
+    def test_replay_returns_stored_response(self):
+        first = self.checkout()
+        with CaptureQueriesContext(connection) as captured:
+            replay = self.checkout()
+
+        self.assertEqual((replay.status_code, replay.content), (first.status_code, first.content))
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual((Sale.objects.count(), self.quantity()), (1, 99))
+        # Sessiya, foydalanuvchi va bitta indeksli qidiruv
+        self.assertEqual(len(captured.captured_queries), 3)
+
+    def test_same_key_with_other_body_is_rejected(self):
+        self.checkout()
+        response = self.checkout({**self.body, 'amount': 5})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Sale.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        Product.objects.filter(pk=self.product.pk).update(quantity=0)
+        self.assertEqual(self.checkout().status_code, 400)
+        Product.objects.filter(pk=self.product.pk).update(quantity=5)
+        self.assertEqual(self.checkout().status_code, 201)
+
+    def test_concurrent_first_requests_run_once(self):
+        request = RequestFactory().post('/checkout/', json.dumps(self.body), content_type='application/json')
+        lookup = idempotency.lookup
+
+        # Kalit topilmagandan keyin parallel so'rov o'z sotuvini saqlab ulguradi
+        def racing_lookup(scope, key):
+            entry = lookup(scope, key)
+            if entry is None and not IdempotencyKey.objects.exists():
+                idempotency.store(scope, key, idempotency.fingerprint(request), 201, '{"sale": 0}')
+            return entry
+
+        with mock.patch.object(idempotency, 'lookup', racing_lookup):
+            response = self.checkout()
+
+        self.assertEqual((response.status_code, response.json()), (201, {'sale': 0}))
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual((Sale.objects.count(), self.quantity()), (0, 100))
+
+    def test_expired_keys_are_evicted(self):
+        self.checkout()
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.checkout()
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual((Sale.objects.count(), self.quantity()), (2, 98))
+
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.checkout(key='kalit-2')
+        self.assertEqual(idempotency.purge(), 1)
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['kalit-2'])
+
+
+class BarcodeCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        barcode.clear()
+        self.product, = self.products(1, quantity=10)
+        Product.objects.filter(pk=self.product.pk).update(barcode="4780000000001")
+
+    def lookup(self):
+        return barcode.lookup(self.branch.pk, "4780000000001")
+
+    def test_lookup_is_cached(self):
+        self.assertEqual(self.lookup()['quantity'], 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.lookup()['quantity'], 10)
+
+    def test_sale_drops_cached_entry(self):
+        self.lookup()
+        checkout(
+            branch=self.branch, worker=self.worker, amount=0,
+            items=[{'product': self.product.pk, 'quantity': 3}],
+        )
+        self.assertEqual(self.lookup()['quantity'], 7)
+
+    def test_receipt_drops_cached_entry(self):
+        self.lookup()
+        add_product = AddProduct.objects.create(branch=self.branch, worker=self.worker)
+        AddProductItem.objects.create(add_product=add_product, product=self.product, input_quantity=5, price=6)
+        self.assertEqual(self.lookup()['quantity'], 15)
+
+    def test_price_change_drops_cached_entry(self):
+        self.lookup()
+        product = Product.objects.get(pk=self.product.pk)
+        product.sale_price = 12
+        product.save()
+        self.assertEqual(self.lookup()['sale_price'], 12)
+
+
+class HourlyRollupTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = Branch.objects.create(name="Chilonzor", location="Toshkent")
+        # Ikkala chetida ham bo'lak soat qoladigan oyna; kirimlar hozirgi vaqtda yoziladi
+        now = timezone.now()
+        self.start = now - timedelta(hours=3, minutes=20)
+        self.end = now + timedelta(minutes=20)
+
+    def sale(self, at, total, amount=None, branch=None):
+        sale = Sale(
+            branch=branch or self.branch, worker=self.worker, sold_at=at,
+            total_price=Decimal(total), amount=Decimal(total if amount is None else amount),
+        )
+        sale.save()
+        return sale
+
+    def make_activity(self):
+        minute = timedelta(minutes=1)
+        for at in (
+            self.start - 5 * minute, self.start + 5 * minute, self.start + 65 * minute,
+            self.start + 130 * minute, self.end - 5 * minute, self.end + 5 * minute,
+        ):
+            self.sale(at, 100, amount=90)
+
+        edited = self.sale(self.start + 10 * minute, 40)
+        edited.total_price, edited.amount = Decimal('70'), Decimal('50')
+        edited.save()
+        moved = self.sale(self.start + 70 * minute, 30)
+        moved.branch = self.other
+        moved.save()
+        self.sale(self.end - 10 * minute, 55).delete()
+        Sale.objects.filter(pk__in=[self.sale(self.start + 20 * minute, 15).pk]).delete()
+
+        product, = self.products(1)
+        checkout(
+            branch=self.branch, worker=self.worker, amount=0,
+            items=[{'product': product.pk, 'quantity': 4}],
+        )
+        add_product = AddProduct.objects.create(branch=self.branch, worker=self.worker)
+        AddProductItem.objects.create(add_product=add_product, product=product, input_quantity=5, price=6)
+
+        expense = dict(branch=self.branch, worker=self.worker, category='boshqa xarajatlar')
+        edited = Expense.objects.create(amount=20, **expense)
+        edited.amount = Decimal('25')
+        edited.save()
+        Expense.objects.create(amount=9, **expense).delete()
+
+    def rollups(self):
+        fields = ('sales_total', 'discounts_total', 'purchase_total', 'expense_total', 'items_sold')
+        return {
+            (row.pop('branch_id'), row.pop('hour')): row
+            for row in HourlyRollup.objects.values('branch_id', 'hour', *fields)
+            if any(row[name] for name in fields)
+        }
+
+    def test_daily_report_matches_raw_aggregate(self):
+        self.make_activity()
+        report = DailyReport.objects.create(branch=self.branch, start_datetime=self.start, end_datetime=self.end)
+
+        sales = Sale.objects.filter(
+            branch=self.branch, sold_at__gte=self.start, sold_at__lte=self.end,
+        ).aggregate(total=Sum('total_price'), discount=Sum('discount'))
+        purchase = AddProductItem.objects.filter(
+            add_product__branch=self.branch, added_at__gte=self.start, added_at__lte=self.end,
+        ).aggregate(total=Sum('total_price'))
+
+        self.assertEqual(report.total_sales, sales['total'])
+        self.assertEqual(report.total_discounts, sales['discount'])
+        self.assertEqual(report.total_purchase, purchase['total'])
+        # Hisobot rollup orqali hisoblangani tekshiriladi: kamida bitta to'liq soat bor
+        self.assertLess(ceil_hour(self.start), floor_hour(self.end))
+
+    def test_rebuild_matches_incremental_rows(self):
+        self.make_activity()
+        incremental = self.rollups()
+
+        HourlyRollup.rebuild()
+
+        self.assertEqual(self.rollups(), incremental)
+        self.assertIn(self.other.pk, {branch for branch, _ in incremental})
+
+
+class StockSnapshotTests(ApiTestCase):
+    def test_quantity_at(self):
+        product, = self.products(1, quantity=10)
+        times = []
+
+        def mark():
+            times.append(timezone.now())
+
+        mark()
+        take_snapshot(self.branch)
+        mark()
+        checkout(
+            branch=self.branch, worker=self.worker, amount=0,
+            items=[{'product': product.pk, 'quantity': 3}],
+        )
+        mark()
+        add_product = AddProduct.objects.create(branch=self.branch, worker=self.worker)
+        AddProductItem.objects.create(add_product=add_product, product=product, input_quantity=5, price=6)
+        mark()
+
+        # Eng yaqin snapshotdan oldinga yoki hozirgi qoldiqdan orqaga: natija bir xil
+        expected = [10, 10, 7, 12]
+        self.assertEqual([quantity_at(product, at)[0] for at in times], expected)
+
+        last = take_snapshot(self.branch)
+        self.assertEqual(last.items.get().quantity, 12)
+        self.assertEqual([quantity_at(product, at)[0] for at in times], expected)
+
+    def test_stock_at_view(self):
+        product, = self.products(1, quantity=10)
+        response = self.client.get(f'/stock/{product.pk}/', {'at': timezone.now().isoformat()})
+        self.assertEqual((response.status_code, response.json()['quantity']), (200, '10.000'))
+
+        for at in ("kecha", "2025-02-31T00:00"):
+            with self.subTest(at=at):
+                self.assertEqual(self.client.get(f'/stock/{product.pk}/', {'at': at}).status_code, 400)
+
+
+class DashboardLowStockTests(ApiTestCase):
+    def test_threshold(self):
+        low, ok = self.products(2, quantity=5)
+        Product.objects.filter(pk=low.pk).update(reorder_level=5)
+
+        def pks(params):
+            response = self.client.get('/dashboard/low-stock/', params)
+            self.assertEqual(response.status_code, 200)
+            return [p['pk'] for p in response.json()['products']]
+
+        self.assertEqual(pks({}), [low.pk])
+        self.assertEqual(pks({'threshold': '5'}), [low.pk, ok.pk])
+        self.assertEqual(pks({'threshold': '4.5'}), [])
+        for threshold in ('NaN', 'Infinity', '-inf', 'abc'):
+            with self.subTest(threshold=threshold):
+                response = self.client.get('/dashboard/low-stock/', {'threshold': threshold})
+                self.assertEqual(response.status_code, 400)
+
+
+class StockAlertTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product, = self.products(1, quantity=10)
+        Product.objects.filter(pk=self.product.pk).update(reorder_level=5)
+
+    def alerts(self):
+        return [(alert.quantity, alert.resolved_at is None) for alert in StockAlert.objects.order_by('pk')]
+
+    def test_crossing_down_opens_alert(self):
+        stock.take({self.product.pk: 4})
+        self.assertEqual(self.alerts(), [])
+        stock.take({self.product.pk: 2})
+        self.assertEqual(self.alerts(), [(4, True)])
+        self.assertEqual(list(alerts.low_stock(self.branch)), [self.product])
+
+    def test_already_below_does_not_open_another(self):
+        stock.take({self.product.pk: 5})
+        stock.take({self.product.pk: 1})
+        stock.take({self.product.pk: 2})
+        self.assertEqual(self.alerts(), [(5, True)])
+
+    def test_restock_resolves_alert(self):
+        stock.take({self.product.pk: 8})
+        stock.put({self.product.pk: 2})
+        # Hali ham minimal qoldiqda: alert ochiq qoladi
+        self.assertEqual(self.alerts(), [(2, True)])
+
+        stock.put({self.product.pk: 3})
+        self.assertEqual(self.alerts(), [(2, False)])
+
+        # Qayta tushsa yangi alert ochiladi
+        stock.take({self.product.pk: 4})
+        self.assertEqual(self.alerts(), [(2, False), (3, True)])
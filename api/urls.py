@@ -1,5 +1,21 @@
-from django.urls import path
+from django.urls import path, re_path
+
+from . import views
 
 urlpatterns = [
-   
-]
\ No newline at end of file
+    path('checkout/', views.checkout_view, name='checkout'),
+    path('barcode/<int:branch_id>/<str:code>/', views.barcode_view, name='barcode'),
+    path('receiving/import/', views.receiving_import_view, name='receiving-import'),
+    path('sync/sales/', views.sync_sales_view, name='sync-sales'),
+    path('stock/<int:product_id>/', views.stock_at_view, name='stock-at'),
+    re_path(r'^export/(?P<kind>[a-z-]+)\.(?P<fmt>csv|xlsx)$', views.export_view, name='export'),
+    path('dashboard/sales/', views.dashboard_sales_view, name='dashboard-sales'),
+    path('dashboard/low-stock/', views.dashboard_low_stock_view, name='dashboard-low-stock'),
+    path('dashboard/debtors/', views.dashboard_debtors_view, name='dashboard-debtors'),
+    path('dashboard/history/', views.dashboard_history_view, name='dashboard-history'),
+    path('dashboard/live/', views.dashboard_live_view, name='dashboard-live'),
+    path('jobs/', views.job_enqueue_view, name='job-enqueue'),
+    path('jobs/<int:job_id>/', views.job_detail_view, name='job-detail'),
+    path('jobs/<int:job_id>/download/', views.job_download_view, name='job-download'),
+    path('stats/queries/', views.query_stats_view, name='query-stats'),
+]
@@ -0,0 +1,9 @@
+from .checkout import *
+from .barcode import *
+from .stats import *
+from .receiving import *
+from .stock import *
+from .export import *
+from .dashboard import *
+from .jobs import *
+from .sync import *
@@ -0,0 +1,16 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from api.services import barcode
+from .utils import staff_required
+
+__all__ = ['barcode_view']
+
+
+@require_GET
+@staff_required
+def barcode_view(request, branch_id, code):
+    data = barcode.lookup(branch_id, code)
+    if data is None:
+        return JsonResponse({'detail': "Mahsulot topilmadi"}, status=404)
+    return JsonResponse(data)
@@ -0,0 +1,42 @@
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from api.models import Branch, Worker
+from api.services.checkout import checkout
+from .utils import error_response, idempotent, json_body, parse_id, staff_required
+
+__all__ = ['checkout_view']
+
+
+@require_POST
+@staff_required
+@idempotent('checkout')
+def checkout_view(request):
+    try:
+        data = json_body(request)
+
+        branch = Branch.objects.filter(pk=parse_id(data.get('branch'), "Filial noto‘g‘ri")).first()
+        worker_id = parse_id(data.get('worker'), "Hodim noto‘g‘ri")
+        worker = Worker.objects.filter(pk=worker_id, branch=branch).first()
+        if branch is None or worker is None:
+            raise ValidationError("Filial yoki hodim topilmadi")
+
+        sale = checkout(
+            branch=branch,
+            worker=worker,
+            items=data.get('items') or [],
+            amount=data.get('amount', 0),
+            currency=data.get('currency', 'UZS'),
+            customer=data.get('customer'),
+        )
+    except ValidationError as exc:
+        return error_response(exc)
+
+    return JsonResponse({
+        'sale': sale.pk,
+        'total_price': sale.total_price,
+        'discount': sale.discount,
+        'amount': sale.amount,
+        'currency': sale.currency,
+    }, status=201)
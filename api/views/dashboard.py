@@ -0,0 +1,156 @@
+import asyncio
+import json
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q, Sum
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from api.models import Customer, History, HourlyRollup, Product
+from api.services import live
+from .utils import async_staff_required
+
+__all__ = ['dashboard_sales_view', 'dashboard_low_stock_view', 'dashboard_debtors_view', 'dashboard_history_view', 'dashboard_live_view']
+
+MAX_LIMIT = 100
+KEEPALIVE = 15
+
+
+# 🔹 Filial ekranlari shu endpointlarni tez-tez so'raydi. Hammasi async ORM
+# bilan yozilgan: ASGI ostida kutish paytida ishchi oqim band bo'lmaydi.
+def _limit(request, default=20):
+    try:
+        return max(1, min(int(request.GET.get('limit', default)), MAX_LIMIT))
+    except ValueError:
+        return default
+
+
+def _branch_filter(request, field='branch_id'):
+    branch = request.GET.get('branch')
+    return {field: int(branch)} if branch and branch.isdigit() else {}
+
+
+@require_GET
+@async_staff_required
+async def dashboard_sales_view(request):
+    # Tashkent vaqtida kun boshi soatga teng, shuning uchun soatlik rollup yetarli
+    start = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    rows = (
+        HourlyRollup.objects
+        .filter(hour__gte=start, **_branch_filter(request))
+        .values('branch_id', 'branch__name')
+        .annotate(
+            sales=Sum('sales_total'),
+            discounts=Sum('discounts_total'),
+            items=Sum('items_sold'),
+            purchases=Sum('purchase_total'),
+            expenses=Sum('expense_total'),
+        )
+        .order_by('branch_id')
+    )
+    return JsonResponse({
+        'date': timezone.localdate(),
+        'branches': [
+            {
+                'branch': row['branch_id'],
+                'name': row['branch__name'],
+                'sales': row['sales'],
+                'discounts': row['discounts'],
+                'items': row['items'],
+                'purchases': row['purchases'],
+                'expenses': row['expenses'],
+            }
+            async for row in rows
+        ],
+    })
+
+
+@require_GET
+@async_staff_required
+async def dashboard_low_stock_view(request):
+    # Mahsulotning o'z minimal qoldig'i bo'yicha (partial indeks), yoki ?threshold= bilan
+    low = Q(quantity__lte=F('reorder_level'))
+    if 'threshold' in request.GET:
+        try:
+            threshold = Decimal(request.GET['threshold'])
+        except InvalidOperation:
+            threshold = None
+        # NaN/Infinity queryset ichida ValidationError beradi
+        if threshold is None or not threshold.is_finite():
+            return JsonResponse({'detail': ["`threshold` son bo‘lishi kerak"]}, status=400)
+        low = Q(quantity__lte=threshold)
+
+    products = (
+        Product.objects
+        .filter(low, **_branch_filter(request))
+        .order_by('quantity', 'pk')
+        .values('pk', 'branch_id', 'name', 'barcode', 'quantity', 'reorder_level')[:_limit(request)]
+    )
+    return JsonResponse({'products': [p async for p in products]})
+
+
+@require_GET
+@async_staff_required
+async def dashboard_debtors_view(request):
+    customers = (
+        Customer.objects
+        .filter(debt__gt=0, **_branch_filter(request))
+        .order_by('-debt', 'pk')
+        .values('pk', 'branch_id', 'name', 'phone_number', 'debt')[:_limit(request)]
+    )
+    return JsonResponse({'customers': [c async for c in customers]})
+
+
+@require_GET
+@async_staff_required
+async def dashboard_history_view(request):
+    histories = (
+        History.objects
+        .filter(**_branch_filter(request))
+        .order_by('-changed_at', '-id')
+        .values(
+            'pk', 'branch_id', 'product_id', 'product__name', 'worker__name',
+            'change_type', 'quantity_changed', 'changed_at',
+        )[:_limit(request)]
+    )
+    return JsonResponse({'history': [h async for h in histories]})
+
+
+async def _live_events(branch_id):
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    live.subscribe(loop, changed)
+    last = None
+    try:
+        while True:
+            if live.stale():
+                await sync_to_async(live.resync_if_stale)()
+
+            data = live.snapshot(branch_id)
+            if data != last:
+                last = data
+                yield f"data: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+            try:
+                await asyncio.wait_for(changed.wait(), KEEPALIVE)
+            except TimeoutError:
+                yield ": ping\n\n"
+            changed.clear()
+    finally:
+        live.unsubscribe(loop, changed)
+
+
+# 🔹 Server-sent events: har bir commitdan keyin filial yig'indilari yuboriladi
+@require_GET
+@async_staff_required
+async def dashboard_live_view(request):
+    branch = _branch_filter(request).get('branch_id')
+    return StreamingHttpResponse(
+        _live_events(branch),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
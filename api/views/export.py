@@ -0,0 +1,52 @@
+from django.core.exceptions import ValidationError
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+
+from api.models import Branch
+from api.services import export
+from .utils import error_response, parse_id, staff_required
+
+__all__ = ['export_view']
+
+
+def _parse_time(value, name):
+    try:
+        parsed = parse_datetime(value or '')
+    except ValueError:
+        # Formati to'g'ri, lekin mavjud bo'lmagan sana (2025-02-31)
+        parsed = None
+    if parsed is None:
+        raise ValidationError(f"`{name}` parametri ISO formatdagi vaqt bo‘lishi kerak")
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+@require_GET
+@staff_required
+def export_view(request, kind, fmt):
+    try:
+        if kind not in export.EXPORTS:
+            raise ValidationError("Noma'lum eksport turi")
+
+        branch = Branch.objects.filter(pk=parse_id(request.GET.get('branch'), "Filial noto‘g‘ri")).first()
+        if branch is None:
+            raise ValidationError("Filial topilmadi")
+        start = _parse_time(request.GET.get('start'), 'start')
+        end = _parse_time(request.GET.get('end'), 'end')
+
+        filename = f"{kind}-{branch.pk}-{start:%Y%m%d}-{end:%Y%m%d}.{fmt}"
+        if fmt == 'xlsx':
+            return FileResponse(
+                export.write_xlsx(kind, branch, start, end),
+                as_attachment=True, filename=filename,
+            )
+    except ValidationError as exc:
+        return error_response(exc)
+
+    response = StreamingHttpResponse(
+        export.stream_csv(kind, branch, start, end),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,61 @@
+from django.core.exceptions import ValidationError
+from django.http import FileResponse, JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from api.models import Job
+from api.services import jobs
+from .utils import error_response, json_body, staff_required
+
+__all__ = ['job_enqueue_view', 'job_detail_view', 'job_download_view']
+
+
+def _job_json(job):
+    return {
+        'id': job.pk,
+        'name': job.name,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'result': job.result,
+        'error': job.error.strip().splitlines()[-1] if job.error else '',
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
+
+
+@require_POST
+@staff_required
+def job_enqueue_view(request):
+    try:
+        data = json_body(request)
+        params = data.get('params') or {}
+        if not isinstance(params, dict):
+            raise ValidationError("params obyekt bo‘lishi kerak")
+        job = jobs.enqueue(str(data.get('name', '')), params, force=bool(data.get('force')))
+    except ValidationError as exc:
+        return error_response(exc)
+
+    return JsonResponse(_job_json(job), status=202)
+
+
+@require_GET
+@staff_required
+def job_detail_view(request, job_id):
+    job = Job.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'detail': "Vazifa topilmadi"}, status=404)
+    return JsonResponse(_job_json(job))
+
+
+@require_GET
+@staff_required
+def job_download_view(request, job_id):
+    job = Job.objects.filter(pk=job_id, status=Job.DONE).first()
+    result = job.result if job is not None else None
+    if not isinstance(result, dict) or not result.get('file'):
+        return JsonResponse({'detail': "Fayl topilmadi"}, status=404)
+
+    path = jobs.RESULTS_DIR / result['file']
+    if not path.is_file():
+        return JsonResponse({'detail': "Fayl topilmadi"}, status=404)
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=result.get('filename') or path.name)
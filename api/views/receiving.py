@@ -0,0 +1,39 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from api.models import AddProduct, Branch, Supplier, Worker
+from api.services.receiving import import_delivery, read_rows
+from .utils import error_response, idempotent, parse_id, staff_required
+
+__all__ = ['receiving_import_view']
+
+
+@require_POST
+@staff_required
+@idempotent('receiving')
+def receiving_import_view(request):
+    upload = request.FILES.get('file')
+    try:
+        if upload is None:
+            raise ValidationError("Fayl yuklanmadi")
+
+        branch = Branch.objects.filter(pk=parse_id(request.POST.get('branch'), "Filial noto‘g‘ri")).first()
+        worker_id = parse_id(request.POST.get('worker'), "Hodim noto‘g‘ri")
+        worker = Worker.objects.filter(pk=worker_id, branch=branch).first()
+        if branch is None or worker is None:
+            raise ValidationError("Filial yoki hodim topilmadi")
+
+        supplier = None
+        supplier_id = parse_id(request.POST.get('supplier'), "Yetkazib beruvchi noto‘g‘ri")
+        if supplier_id is not None:
+            supplier = Supplier.objects.filter(pk=supplier_id).first()
+
+        with transaction.atomic():
+            add_product = AddProduct.objects.create(branch=branch, worker=worker, supplier=supplier)
+            result = import_delivery(add_product, read_rows(upload, upload.name))
+    except ValidationError as exc:
+        return error_response(exc)
+
+    return JsonResponse({'add_product': add_product.pk, **result}, status=201)
@@ -0,0 +1,16 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from api import instrumentation
+from .utils import staff_required
+
+__all__ = ['query_stats_view']
+
+
+@require_GET
+@staff_required
+def query_stats_view(request):
+    return JsonResponse({
+        'enabled': instrumentation.ENABLED,
+        'stats': instrumentation.snapshot(),
+    })
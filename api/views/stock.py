@@ -0,0 +1,36 @@
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+
+from api.models import Product
+from api.services.snapshots import quantity_at
+from .utils import staff_required
+
+__all__ = ['stock_at_view']
+
+
+@require_GET
+@staff_required
+def stock_at_view(request, product_id):
+    product = Product.objects.filter(pk=product_id).first()
+    if product is None:
+        return JsonResponse({'detail': "Mahsulot topilmadi"}, status=404)
+
+    try:
+        at = parse_datetime(request.GET.get('at', ''))
+    except ValueError:
+        # 2025-02-31 kabi formati to'g'ri, lekin mavjud bo'lmagan sana
+        at = None
+    if at is None:
+        return JsonResponse({'detail': "`at` parametri ISO formatdagi vaqt bo‘lishi kerak"}, status=400)
+    if timezone.is_naive(at):
+        at = timezone.make_aware(at)
+
+    quantity, snapshot = quantity_at(product, at)
+    return JsonResponse({
+        'product': product.pk,
+        'at': at,
+        'quantity': quantity,
+        'snapshot': snapshot.pk if snapshot else None,
+    })
@@ -0,0 +1,27 @@
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from api.models import Branch
+from api.services.sync import sync_sales
+from .utils import error_response, idempotent, json_body, parse_id, staff_required
+
+__all__ = ['sync_sales_view']
+
+
+@require_POST
+@staff_required
+@idempotent('sync')
+def sync_sales_view(request):
+    try:
+        data = json_body(request)
+
+        branch = Branch.objects.filter(pk=parse_id(data.get('branch'), "Filial noto‘g‘ri")).first()
+        if branch is None:
+            raise ValidationError("Filial topilmadi")
+
+        results = sync_sales(branch, data.get('sales') or [])
+    except ValidationError as exc:
+        return error_response(exc)
+
+    return JsonResponse({'results': results})
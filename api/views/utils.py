@@ -0,0 +1,91 @@
+import json
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+
+from api.services import idempotency
+
+
+def staff_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not (request.user.is_authenticated and request.user.is_staff):
+            return JsonResponse({'detail': "Ruxsat yo‘q"}, status=403)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def async_staff_required(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not (user.is_authenticated and user.is_staff):
+            return JsonResponse({'detail': "Ruxsat yo‘q"}, status=403)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError("JSON noto‘g‘ri")
+    if not isinstance(data, dict):
+        raise ValidationError("JSON obyekt kutilgan")
+    return data
+
+
+# So'rovdagi id ("abc", [1], Infinity) to'g'ridan-to'g'ri filter(pk=...) ga
+# berilsa 500 bo'ladi; bo'sh qiymat None qaytadi
+def parse_id(value, message="Identifikator noto‘g‘ri"):
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValidationError(message)
+
+
+def error_response(exc, status=400):
+    return JsonResponse({'detail': exc.messages}, status=status)
+
+
+# 🔹 Idempotency-Key sarlavhasi bilan kelgan so'rov bir marta bajariladi.
+# Takroriy so'rov saqlangan javobni bitta indeksli so'rov bilan oladi;
+# javob va yozuvlar bitta tranzaksiyada saqlanadi.
+def idempotent(scope):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get('Idempotency-Key', '').strip()
+            if not key:
+                return view(request, *args, **kwargs)
+            if len(key) > idempotency.MAX_KEY_LENGTH:
+                return error_response(ValidationError("Idempotency-Key juda uzun"))
+
+            digest = idempotency.fingerprint(request)
+            entry = idempotency.lookup(scope, key)
+            if entry is None:
+                try:
+                    with transaction.atomic():
+                        response = view(request, *args, **kwargs)
+                        if 200 <= response.status_code < 300:
+                            idempotency.store(scope, key, digest, response.status_code, response.content.decode())
+                        return response
+                except IntegrityError:
+                    # Shu kalit bilan parallel so'rov oldinroq yakunlangan
+                    entry = idempotency.lookup(scope, key)
+                    if entry is None:
+                        raise
+
+            if entry.fingerprint != digest:
+                return error_response(
+                    ValidationError("Bu Idempotency-Key boshqa so‘rov uchun ishlatilgan"), status=422
+                )
+            response = HttpResponse(entry.response, status=entry.status_code, content_type='application/json')
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        return wrapper
+    return decorator
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -58,8 +59,14 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.instrumentation.QueryStatsMiddleware',
 ]
 
+# So'rovlar soni va vaqtini URL / model metodi bo'yicha yig'ish (standart: o'chiq)
+QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED') == '1'
+QUERY_STATS_FILE = os.environ.get('QUERY_STATS_FILE') or None
+QUERY_STATS_DUMP_INTERVAL = 10
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -83,12 +90,55 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Profil DB_ENGINE orqali tanlanadi:
+#   sqlite   - bitta do'kon uchun: WAL rejimi, IMMEDIATE tranzaksiyalar
+#   postgres - ko'p filial uchun: doimiy ulanishlar yoki psycopg pool (DB_POOL=1)
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DB_POOL = os.environ.get('DB_POOL') == '1'
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'safo'),
+            'USER': os.environ.get('DB_USER', 'safo'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Pool bilan doimiy ulanish (CONN_MAX_AGE) birga ishlatilmaydi
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN', '2')),
+                    'max_size': int(os.environ.get('DB_POOL_MAX', '20')),
+                    'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+                },
+            } if DB_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME') or BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'OPTIONS': {
+                # Yozuvchi tranzaksiya boshidayoq lock oladi: "database is locked"
+                # o'rniga navbat kutadi
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA cache_size=-20000;'
+                    'PRAGMA mmap_size=134217728;'
+                ),
+            },
+        }
     }
-}
 
 
 # Password validation
@@ -244,6 +294,12 @@ UNFOLD = {
                         "link": reverse_lazy("admin:api_dailyreport_changelist"),
                         "permission": lambda request: request.user.has_perm("api.dailyreport_view"),
                     },
+                    {
+                        "title": _("Foyda hisoboti"),
+                        "icon": "trending_up",
+                        "link": reverse_lazy("admin:api_sale_profit"),
+                        "permission": lambda request: request.user.has_perm("api.view_sale"),
+                    },
                 ],
                 
             },